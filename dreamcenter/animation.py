@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+from dreamcenter.enumeration import AnimationState
+
+
+@dataclass
+class AnimationClock:
+    """
+    Global animation tick, advanced once per drawn frame. Sprites keep the tick their current
+    animation started at and derive their frame from the ticks elapsed since.
+    """
+    tick: int = 0
+
+    def advance(self) -> None:
+        self.tick += 1
+
+
+CLOCK = AnimationClock()
+
+
+@dataclass(frozen=True)
+class AnimationClip:
+    """
+    Frame indices of one animation, each shown for `duration` ticks.
+    Looping clips repeat forever, others end after their last frame.
+    """
+    frames: Tuple[str, ...]
+    duration: int
+    loop: bool
+
+    def frame(self, elapsed) -> Optional[str]:
+        """
+        Frame shown `elapsed` ticks into the clip, None once a clip that does not loop has ended
+        """
+        step = elapsed // self.duration
+        if self.loop:
+            return self.frames[step % len(self.frames)]
+        return self.frames[step] if step < len(self.frames) else None
+
+    def next_change(self, elapsed) -> int:
+        """
+        Ticks into the clip at which the frame shown `elapsed` ticks in is replaced, or the clip ends
+        """
+        return (elapsed // self.duration + 1) * self.duration
+
+
+@lru_cache(maxsize=None)
+def animation_clip(state, frames, duration) -> AnimationClip:
+    """
+    Shared clip of `frames` played in animation `state`. Clips of states that kill the sprite
+    or end back in the stopped state play once, every other clip loops.
+    """
+    loop = not (AnimationState.state_kills_sprite(state) or AnimationState.state_ends(state))
+    return AnimationClip(frames=tuple(frames), duration=duration, loop=loop)
+
+
+@lru_cache(maxsize=None)
+def _clip_table(clips) -> Mapping[AnimationState, AnimationClip]:
+    return MappingProxyType({state: animation_clip(state, frames, duration) for state, frames, duration in clips})
+
+
+def animation_clips(**clips) -> Mapping[AnimationState, AnimationClip]:
+    """
+    Read only clip table of a sprite type, built once and shared by every sprite of the type.
+    Takes (frames, duration) per animation state name, e.g. `animation_clips(dying=(frames, 5))`.
+    """
+    return _clip_table(tuple(
+        (AnimationState[state], tuple(frames), duration) for state, (frames, duration) in sorted(clips.items())
+    ))
@@ -5,6 +5,15 @@ from dreamcenter.enumeration import MovementType
 
 DESIRED_FPS = 60
 
+# Milliseconds per frame the task scheduler may spend on AI and deferred work
+SCHEDULER_BUDGET_MS = 2.0
+# Number of frames a full pass over enemies or items is spread across
+AI_INTERVAL = 10
+# Killed sprites kept for reuse per pooled sprite type
+SPRITE_POOL_CAP = 256
+# Positions remembered by moving sprites for pushing them back out of walls and doors
+POSITION_HISTORY = 40
+
 # Tile width and height.
 TILE_HEIGHT = 50
 TILE_WIDTH = 50
@@ -184,6 +193,11 @@ DEBRIS = {
     "chair": {"replacement": "chair_remains", "anim_dying": ANIMATIONS["chair_death"]},
 }
 
+# Shrubs which block movement and are stamped into the nav grid along with all debris
+BLOCKING_SHRUBS = [
+    "blackboard",
+]
+
 """
 (top left, top right), (bottom left, bottom right)
 """
@@ -250,6 +264,25 @@ CONNECTION_MATCH = {}
 # Values used in map_logic assigning the upper maximum and middle starting position
 MAP_GRID_UPPER_MAX = 40
 STARTING_POSITION = (19, 19)
+# Fewest rooms passed from the start to a special room such as the shop, when the map has end points that far
+SPECIAL_ROOM_MIN_DISTANCE = 4
+# Visited rooms whose saved state is kept in memory, older room states are spilled to disk
+ROOM_STATES_IN_MEMORY = 16
+# Bytes of unused records after which the room state spill file is rewritten, once they also outweigh the live ones
+SPILL_COMPACT_BYTES = 64 * 1024
+# Recently left rooms whose sprites are kept detached, ready to be swapped back in on re-entry
+SUSPENDED_ROOMS = 4
+
+# Default AI level of detail tiers for enemies.
+# Ranges are multiples of the enemy's aggro_distance measured to the player,
+# intervals are the number of perception passes between ticks in that tier.
+# Only enemies in range of the near tier run line of sight checks and pathfinding.
+AI_LOD = {
+    "near_range": 1.0,
+    "mid_range": 2.0,
+    "mid_interval": 2,
+    "far_interval": 6,
+}
 
 # dict{dict} used to determine enemy stats on creation
 ENEMY_STATS = {
@@ -265,6 +298,7 @@ ENEMY_STATS = {
         "movement": MovementType.chase,
         "movement_cooldown": 0,
         "damaged_image": "skeleton_damaged",
+        "ai_lod": AI_LOD,
     },
     "spider": {
         "value": 2,
@@ -278,6 +312,7 @@ ENEMY_STATS = {
         "movement": MovementType.wander_chase,
         "movement_cooldown": 70,
         "damaged_image": "spider_damaged",
+        "ai_lod": {**AI_LOD, "mid_range": 1.5, "far_interval": 4},
     },
 }
 
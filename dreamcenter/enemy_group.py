@@ -1,12 +1,22 @@
 import random
+import numpy as np
 from dataclasses import dataclass, field
 from typing import List
 from pygame import Vector2 as Vector
 from itertools import repeat
 from dreamcenter.sprites import SpriteManager
 from dreamcenter.helpers import get_line
-from dreamcenter.enumeration import AnimationState, MovementType, Layer
-from dreamcenter.path_finding import find_path, convert_path
+from dreamcenter.enumeration import AnimationState, MovementType, Layer, AILevel
+from dreamcenter.path_finding import find_path, convert_path, grid_cell
+from dreamcenter.replanning import DStarLite
+from dreamcenter.entities import ENTITIES, MOVEMENT_CODES
+
+# Movement codes of the entity store movement column used by the batched perception stage
+WANDER_CODES = [MOVEMENT_CODES[movement] for movement in (MovementType.wander, MovementType.wander_chase)]
+CHASE_CODES = [
+    MOVEMENT_CODES[movement]
+    for movement in (MovementType.wander_chase, MovementType.chase, MovementType.ranged_chase)
+]
 
 
 @dataclass
@@ -16,45 +26,149 @@ class EnemyGroup:
     grid = []
     enemies: List = field(default_factory=list)
     obstacles: List = field(default_factory=list)
+    store = ENTITIES
 
     def spawn_enemy(self):
         pass
 
     def update(self):
-        for enemy in self.enemies:
-            self.handle_movement(enemy)
-            self.handle_death(enemy)
+        for _ in self.perception():
+            pass
 
-    def handle_movement(self, enemy) -> None:
+    def tick(self):
         """
-        Determines how movement will be handled based on its 'MovementType'
+        Runs the per frame cooldown system over the entities of the current room
+        """
+        self.store.tick_cooldowns()
 
+    def perception(self):
         """
-        if enemy.movement in (MovementType.wander, MovementType.wander_chase):
-            if enemy.movement_cooldown_remaining == 0:
-                enemy.random_movement(enemy.speed * 30)
-                if enemy.animation_state is not AnimationState.walking:
-                    enemy.animation_state = AnimationState.walking
-                enemy.movement_cooldown_remaining = enemy.movement_cooldown
+        Generator running the batched perception stage for every enemy in its first step,
+        then dispatching a single enemy needing a movement change or death per step.
+        Registered with the task scheduler so a pass over all enemies is spread across frames.
+        """
+        enemies = self.enemies.copy()
+        if not enemies:
+            return
+        wander, chase, dead = self.perceive(enemies)
+        yield
+        for index in np.flatnonzero(wander | chase | dead):
+            enemy = enemies[index]
+            if not enemy.alive():
+                continue
+            if dead[index]:
+                self.handle_death(enemy)
+            else:
+                self.handle_movement(enemy, wander[index], chase[index])
+            yield
+
+    def perceive(self, enemies):
+        """
+        Gathers aggro distance and AI level of detail stats of `enemies` into arrays, reads
+        position, cooldowns, movement type and health from their entity store columns, and
+        computes their tiers and the masks of enemies due to wander, chase or die in one go.
+        Only enemies in the near tier are considered for chasing.
+        """
+        count = len(enemies)
+        store = self.store
+        rows = np.fromiter((enemy.entity for enemy in enemies), dtype=int, count=count)
+        position = store.position[rows]
+        aggro = np.fromiter((enemy.aggro_distance for enemy in enemies), dtype=float, count=count)
+        near_range = np.fromiter((enemy.ai_lod["near_range"] for enemy in enemies), dtype=float, count=count)
+        mid_range = np.fromiter((enemy.ai_lod["mid_range"] for enemy in enemies), dtype=float, count=count)
+        mid_interval = np.fromiter((enemy.ai_lod["mid_interval"] for enemy in enemies), dtype=int, count=count)
+        far_interval = np.fromiter((enemy.ai_lod["far_interval"] for enemy in enemies), dtype=int, count=count)
+        ticks = store.ai_ticks[rows]
+        movement_cooldown = store.movement_cooldown_remaining[rows]
+        movement = store.movement[rows]
+
+        distance = np.hypot(*(position - self.player.rect.center).T)
+        level = np.select(
+            [distance <= aggro * near_range, distance <= aggro * mid_range],
+            [AILevel.near, AILevel.mid],
+            AILevel.far,
+        )
+        interval = np.choose(level, [np.ones(count, dtype=int), mid_interval, far_interval])
+        ticks += 1
+        due = ticks >= interval
+        ticks[due] = 0
+        store.ai_level[rows] = level
+        store.ai_ticks[rows] = ticks
+
+        dead = store.dead(rows)
+        alive_due = due & ~dead
+        wander = alive_due & np.isin(movement, WANDER_CODES) & (movement_cooldown == 0)
+        chase = alive_due & np.isin(movement, CHASE_CODES) & (level == AILevel.near) & (distance <= aggro)
+        return wander, chase, dead
+
+    def path_request(self, enemy, target):
+        """
+        Generator computing a pathfinding path for `enemy` towards `target`.
+        Queued as a one-shot scheduler task instead of blocking the collision handler.
+        Gives the enemy its own incremental planner, which later requests repair and reuse,
+        limited to the cells with enough clearance for the enemy's footprint.
+        """
+        if enemy not in self.enemies or enemy.ai_level is not AILevel.near:
+            return
+        if enemy.planner is None or enemy.planner.nav_grid is not self.grid:
+            enemy.planner = DStarLite(self.grid, clearance=enemy.clearance)
+        self.follow_planner(enemy, target)
+        yield
+
+    @staticmethod
+    def follow_planner(enemy, target):
+        """
+        Replans the path of `enemy` towards `target` with its incremental planner
+        """
+        grid_path = enemy.planner.plan(grid_cell(enemy.rect.center), grid_cell(target))
+        enemy.path = zip(convert_path(grid_path, enemy.speed), repeat(0))
+        enemy.animation_state = AnimationState.walking
+        enemy.final_position = target
 
-        if enemy.movement in (MovementType.wander_chase, MovementType.chase, MovementType.ranged_chase):
-            if self.in_sight(enemy, self.player):
+    def handle_movement(self, enemy, wander, chase) -> None:
+        """
+        Applies the movement changes decided by the perception stage.
+        `chase` enemies are already known to be in aggro range, so only line of sight is checked
+        """
+        if wander:
+            enemy.random_movement(enemy.speed * 30)
+            if enemy.animation_state is not AnimationState.walking:
+                enemy.animation_state = AnimationState.walking
+            enemy.movement_cooldown_remaining = enemy.movement_cooldown
+
+        if chase:
+            if self.line_clear(enemy, self.player):
                 enemy.direct_movement(self.player.rect.center)
                 if enemy.animation_state is not AnimationState.walking:
                     enemy.animation_state = AnimationState.walking
+            elif enemy.planner is not None:
+                self.follow_planner(enemy, self.player.rect.center)
 
     def handle_death(self, enemy):
         if enemy.health <= 0:
             enemy.path = None
+            enemy.planner = None
             self.handle_drops(enemy)
             enemy.animation_state = AnimationState.dying
             self.enemies.remove(enemy)
 
-    def in_sight(self, enemy, target):
-        line_of_sight = get_line(enemy.rect.center, target.rect.center)
+    def handle_deaths(self):
+        """
+        Handles the deaths of every enemy killed since the last perception pass
+        """
+        for enemy in [enemy for enemy in self.enemies if enemy.health <= 0]:
+            self.handle_death(enemy)
 
-        if Vector(line_of_sight[0]).distance_to(line_of_sight[-1]) > enemy.aggro_distance:
+    def in_sight(self, enemy, target):
+        if Vector(enemy.rect.center).distance_to(target.rect.center) > enemy.aggro_distance:
             return False
+        return self.line_clear(enemy, target)
+
+    def line_clear(self, enemy, target):
+        """
+        Returns true when no obstacle within aggro range of `enemy` blocks the line to `target`
+        """
+        line_of_sight = get_line(enemy.rect.center, target.rect.center)
 
         obstacle_list = [obstacle.rect for obstacle in self.obstacles]
         zone = enemy.rect.inflate(enemy.aggro_distance * 2, enemy.aggro_distance * 2)
@@ -95,7 +209,7 @@ class EnemyGroup:
         return list(dict.keys({k: v for k, v in sorted(order.items(), key=lambda item: item[1])}))
 
     @staticmethod
-    def find_pathfinding_path(position, target, grid, speed):
-        grid_path = find_path(position, target, grid)
+    def find_pathfinding_path(position, target, grid, speed, clearance=1):
+        grid_path = find_path(position, target, grid, clearance)
 
         return zip(convert_path(grid_path, speed), repeat(0))
\ No newline at end of file
@@ -0,0 +1,172 @@
+import weakref
+import numpy as np
+from dataclasses import dataclass, field
+from dreamcenter.enumeration import AILevel, MovementType
+
+# Integer codes of MovementType stored in the movement column
+MOVEMENT_CODES = {movement: code for code, movement in enumerate(MovementType)}
+MOVEMENTS = tuple(MovementType)
+
+# Column name -> (dtype, columns per entity) of every column in an entity store
+COLUMNS = {
+    "active": (bool, 1),
+    "moving": (bool, 1),
+    "position": (float, 2),
+    "health": (float, 1),
+    "cooldown_remaining": (np.int32, 1),
+    "movement_cooldown_remaining": (np.int32, 1),
+    "movement": (np.int8, 1),
+    "ai_level": (np.int8, 1),
+    "ai_ticks": (np.int32, 1),
+    "waiting": (bool, 1),
+    "motion": (bool, 1),
+    "velocity": (float, 2),
+    "destination": (float, 2),
+    "arrival_radius": (float, 1),
+    "animation_start": (np.int64, 1),
+    "next_frame_tick": (np.int64, 1),
+}
+INITIAL_CAPACITY = 64
+# Next frame tick of entities whose frame never changes
+NEVER = np.iinfo(np.int64).max
+
+
+@dataclass
+class EntityStore:
+    """
+    Columnar state of dynamic entities, one row per entity and one array per component.
+
+    Directed sprites, enemies, items, buffs, projectiles and debris, keep a row number in `entity`
+    and read and write their components through `Column` attributes, so existing call sites keep
+    working while systems such as `advance_motion`, `animate` and `tick_cooldowns` run over whole
+    columns at once. Only `active` rows, the entities in the game's layers, are touched by systems.
+    Rows are released when their sprite is garbage collected and reused by later entities.
+    """
+    capacity: int = INITIAL_CAPACITY
+    free: list = field(default_factory=list)
+    size: int = 0
+    # Weak reference to the sprite of each row, for systems that call back into sprites
+    owners: list = field(default_factory=list)
+
+    def __post_init__(self):
+        for name, (dtype, width) in COLUMNS.items():
+            shape = (self.capacity, width) if width > 1 else (self.capacity,)
+            setattr(self, name, np.zeros(shape, dtype=dtype))
+
+    def allocate(self, owner) -> int:
+        """
+        Returns a cleared row for the new entity `owner`, growing every column when the store is full
+        """
+        if self.free:
+            row = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self.grow()
+            row = self.size
+            self.size += 1
+            self.owners.append(None)
+        self.clear(row)
+        self.owners[row] = weakref.ref(owner)
+        return row
+
+    def clear(self, row) -> None:
+        for name in COLUMNS:
+            getattr(self, name)[row] = 0
+
+    def release(self, row) -> None:
+        self.active[row] = False
+        self.owners[row] = None
+        self.free.append(row)
+
+    def grow(self) -> None:
+        self.capacity *= 2
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros((self.capacity, *column.shape[1:]), dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def activate(self, rows, active=True) -> None:
+        self.active[np.asarray(rows, dtype=int)] = active
+
+    def advance_motion(self) -> None:
+        """
+        Movement system: steps every active entity with a move order by its velocity, the last step
+        landing on its destination, and ends the orders of entities within their arrival radius.
+        Waiting entities hold their position for the frame.
+        """
+        rows = np.flatnonzero(self.active & self.motion & ~self.waiting)
+        if not rows.size:
+            return
+        position = self.position[rows]
+        destination = self.destination[rows]
+        velocity = self.velocity[rows]
+        remaining = np.einsum("ij,ij->i", destination - position, destination - position)
+        arrived = remaining <= self.arrival_radius[rows] ** 2
+        landing = remaining <= np.einsum("ij,ij->i", velocity, velocity)
+        stepped = np.where(landing[:, None], destination, position + velocity)
+        self.position[rows] = np.where(arrived[:, None], position, stepped)
+        self.motion[rows[arrived]] = False
+
+    def animate(self, tick) -> None:
+        """
+        Animation system: calls `animate` of the active entities whose frame changes by `tick`,
+        entities between frames or without an animation are not visited
+        """
+        for row in np.flatnonzero(self.active & (self.next_frame_tick <= tick)).tolist():
+            owner = self.owners[row]()
+            if owner is not None:
+                owner.animate()
+
+    def tick_cooldowns(self) -> None:
+        """
+        Cooldown system: counts down attack cooldowns of active entities and
+        movement cooldowns of active entities that are not moving
+        """
+        cooldown = self.cooldown_remaining
+        cooldown[self.active & (cooldown > 0)] -= 1
+        movement_cooldown = self.movement_cooldown_remaining
+        movement_cooldown[self.active & ~self.moving & (movement_cooldown > 0)] -= 1
+
+    def dead(self, rows) -> np.ndarray:
+        """
+        Death system: mask of the entities in `rows` without health left
+        """
+        return self.health[rows] <= 0
+
+
+class Column:
+    """
+    Attribute of an entity facade stored in the column of the same name of its `store`,
+    at row `entity`, optionally converted with `encode` and `decode`
+    """
+
+    def __init__(self, encode=None, decode=None):
+        self.encode = encode
+        self.decode = decode
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance.store, self.name)[instance.entity]
+        value = value.tolist()
+        return value if self.decode is None else self.decode(value)
+
+    def __set__(self, instance, value):
+        getattr(instance.store, self.name)[instance.entity] = value if self.encode is None else self.encode(value)
+
+
+def movement_column() -> Column:
+    return Column(encode=MOVEMENT_CODES.__getitem__, decode=MOVEMENTS.__getitem__)
+
+
+def ai_level_column() -> Column:
+    return Column(encode=int, decode=AILevel)
+
+
+# Store shared by every directed sprite
+ENTITIES = EntityStore()
@@ -47,6 +47,15 @@ class MovementType(enum.Enum):
     ranged_chase = "ranged_chase"
 
 
+class AILevel(enum.IntEnum):
+    """
+    AI level of detail tiers, from full perception down to rarely ticked
+    """
+    near = 0
+    mid = 1
+    far = 2
+
+
 class Layer(enum.IntEnum):
     """
     Possible layers which controls sprite display order
@@ -3,7 +3,6 @@ import math
 import pygame as pg
 import os
 import time
-import json
 from dreamcenter.loader import import_image
 from dataclasses import dataclass, field
 from dreamcenter.game_state import GameState, StateError
@@ -14,13 +13,10 @@ from dreamcenter.constants import (
     IMAGE_SPRITES,
 )
 from dreamcenter.helpers import (
-    tile_positions,
     connection_match_builder,
-    create_tile_map,
-)
-from dreamcenter.sprites import (
-    Background,
 )
+from dreamcenter.tilemap import Tilemap
+from dreamcenter.templates import BINARY_LEVEL_SUFFIX, encode_level
 
 
 @dataclass
@@ -78,8 +74,9 @@ class DreamGame:
                 self.game_over.loop()
         self.quit()
 
-    @staticmethod
-    def quit():
+    def quit(self):
+        if self.game_play is not None:
+            self.game_play.prefetcher.shutdown()
         pg.quit()
 
     def start_game(self):
@@ -158,38 +155,16 @@ def start_game():
     game.start_game()
 
 
-def create_background_tile_map(raw_tile_map):
-    """
-    Creates a background tile map given a raw tile map sourced from a level save file.
-    """
-    background_tiles = create_tile_map()
-    for (y, x, dx, dy) in tile_positions():
-        raw_tile = raw_tile_map[y][x]
-        background_tile = Background.create_from_sprite(
-            groups=[],
-            index=raw_tile["index"],
-            orientation=raw_tile["orientation"],
-        )
-        background_tile.rect.topleft = (dx, dy)
-        background_tiles[y][x] = background_tile
-    return background_tiles
-
-
 def save_level(tile_map, shrubs, enemies, traps, buffs, items, file_obj=None, return_directly=False):
     """
     Saves `tile_map` and `shrubs` to file_obj. No other sprite types (turrets, etc.) are saved.
+    Files named with BINARY_LEVEL_SUFFIX are saved in the binary level format, anything else as JSON.
     """
-    output_map = create_tile_map()
     # This is the default format for the file. If you change it, you
     # must ensure the loader is suitably updated also.
     data = {"background": None, "shrub": None, "enemies": None, "traps": None, "buffs": None, "items": None}
-    for (y, x, _, _) in tile_positions():
-        bg_tile = tile_map[y][x]
-        assert isinstance(
-            bg_tile, Background
-        ), f"Must be a Background tile object and not a {bg_tile}"
-        output_map[y][x] = {"index": bg_tile.index, "orientation": bg_tile.orientation}
-    data["background"] = output_map
+    assert isinstance(tile_map, Tilemap), f"Must be a Tilemap and not a {tile_map}"
+    data["background"] = tile_map.raw()
     output_shrubs = []
     output_enemies = []
     output_buffs = []
@@ -240,7 +215,11 @@ def save_level(tile_map, shrubs, enemies, traps, buffs, items, file_obj=None, re
     data["items"] = output_items
     if return_directly:
         return data
-    file_obj.write(json.dumps(data))
+    if getattr(file_obj, "name", "").endswith(BINARY_LEVEL_SUFFIX):
+        # Level save dialogs open files in text mode, the binary format goes to the underlying buffer
+        getattr(file_obj, "buffer", file_obj).write(encode_level(data, binary=True))
+    else:
+        file_obj.write(encode_level(data))
 
 
 from dreamcenter.game_play import GamePlaying
@@ -1,10 +1,11 @@
 import pygame as pg
-import json
 from dataclasses import dataclass, field
 from typing import Optional
 from dreamcenter.game_state import GameState
 from dreamcenter.game import GameLoop
-from dreamcenter.game import create_background_tile_map, save_level
+from dreamcenter.game import save_level
+from dreamcenter.tilemap import Tilemap
+from dreamcenter.templates import template_from_file
 from dreamcenter.constants import (
     DESIRED_FPS,
     IMAGE_SPRITES,
@@ -12,8 +13,6 @@ from dreamcenter.constants import (
     KEY_SHRUB,
     KEY_ENEMY,
     KEY_BUFF,
-    WALLS,
-    DOORS,
 )
 from dreamcenter.helpers import (
     create_surface,
@@ -21,7 +20,6 @@ from dreamcenter.helpers import (
     tile_positions,
     open_dialog,
     save_dialog,
-    create_tile_map,
 )
 from dreamcenter.sprites import (
     Layer,
@@ -53,15 +51,16 @@ class GameEditing(GameLoop):
         )
 
     def create_blank_level(self):
-        self.load_level(create_tile_map({"index": "blank", "orientation": 0}), [], [], [], [])
+        self.load_level(None, [], [], [], [], tile_map=Tilemap.filled("blank"))
 
-    def load_level(self, background, shrubs, enemies, buffs, traps):
+    def load_level(self, background, shrubs, enemies, buffs, traps, tile_map=None):
         """
         Given a valid tile map of `background` tiles, and a list
         of `shrubs`, load them into the game and reset the game.
+        A `tile_map` already built is used instead of `background`.
         """
         self.layers.empty()
-        self.level = create_background_tile_map(background)
+        self.level = tile_map if tile_map is not None else Tilemap.from_raw(background)
         self.draw_background()
         for shrub in shrubs:
             self.sprite_manager.select_sprites(
@@ -102,26 +101,20 @@ class GameEditing(GameLoop):
 
     def draw_background(self):
         self.background.blit(IMAGE_SPRITES[(False, False, "edit_background")], (0, 0))
+        doors = self.level.is_door()
+        walls = self.level.is_wall()
         for (y, x, dx, dy) in tile_positions():
-            background_tile = self.level[y][x]
-            if background_tile.index in DOORS:
-                self.sprite_manager.create_door(
-                    position=(dx, dy),
-                    index=background_tile.index,
-                    orientation=background_tile.orientation,
-                )
-            elif background_tile.index in WALLS:
-                self.sprite_manager.create_wall(
-                    position=(dx, dy),
-                    index=background_tile.index,
-                    orientation=background_tile.orientation,
-                )
+            if doors[y, x]:
+                create = self.sprite_manager.create_door
+            elif walls[y, x]:
+                create = self.sprite_manager.create_wall
             else:
-                self.sprite_manager.create_background(
-                    position=(dx, dy),
-                    index=background_tile.index,
-                    orientation=background_tile.orientation,
-                )
+                create = self.sprite_manager.create_background
+            create(
+                position=(dx, dy),
+                index=self.level.index(y, x),
+                orientation=self.level.orientation(y, x),
+            )
 
     def draw(self):
         self.screen.blit(self.background, (0, 0))
@@ -151,7 +144,7 @@ class GameEditing(GameLoop):
                 for sprite in self.sprite_manager.sprites:
                     if sprite.layer == Layer.background:
                         gx, gy = tile_position(sprite.rect.topleft)
-                        self.level[gy][gx] = sprite
+                        self.level.set(gy, gx, sprite.index, sprite.orientation)
                     else:
                         self.sprite_manager.place(self.mouse_position)
                 self.sprite_manager.empty()
@@ -192,7 +185,7 @@ class GameEditing(GameLoop):
                 self.create_blank_level()
 
     def open_level(self, file_obj):
-        data = json.loads(file_obj.read())
+        data = template_from_file(file_obj).level_data()
         self.load_level(
             background=data["background"],
             shrubs=data["shrubs"],
@@ -1,37 +1,40 @@
 import pygame as pg
-import random
 from pygame import Vector2 as Vector
-import json
-from pathfinding.core.grid import Grid
-from dreamcenter.loader import import_level
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Optional, List
 from dreamcenter.map_logic import Map
-from dreamcenter.path_finding import define_grid
+from dreamcenter.path_finding import define_grid, NavGrid
 from dreamcenter.player_group import PlayerGroup
 from dreamcenter.enemy_group import EnemyGroup
 from dreamcenter.text_group import TextGroup
 from dreamcenter.game_state import GameState
 from dreamcenter.game import GameLoop
-from dreamcenter.game import save_level, create_background_tile_map
-from dreamcenter.sprites import SpriteManager
+from dreamcenter.tilemap import Tilemap
+from dreamcenter.sprites import SpriteManager, ActiveLayeredUpdates
 from dreamcenter.special_effects import SpecialEffects
+from dreamcenter.scheduler import TaskScheduler
+from dreamcenter.animation import CLOCK
+from dreamcenter.entities import ENTITIES
+from dreamcenter.prefetch import RoomPrefetcher
+from dreamcenter.registry import IS_BLOCKING
+from dreamcenter.templates import RoomDelta, RoomTemplate, room_template, template_from_file
 from dreamcenter.constants import (
     DESIRED_FPS,
+    AI_INTERVAL,
     IMAGE_SPRITES,
     MOUSE_RIGHT,
     MOUSE_LEFT,
-    WALLS,
-    DOORS,
     CONNECTION_MATCH,
     LEVEL_CONNECTIONS,
     ALLOWED_BUFFS,
     DEBRIS,
+    STARTING_POSITION,
+    SUSPENDED_ROOMS,
 )
 from dreamcenter.helpers import (
     create_surface,
     tile_positions,
-    create_tile_map,
     collide_mask,
     range_check,
 )
@@ -43,6 +46,32 @@ from dreamcenter.enumeration import (
 )
 
 
+# Layers holding the sprites of a room, kept with the room while it is suspended
+ROOM_LAYERS = (
+    Layer.background,
+    Layer.wall,
+    Layer.door,
+    Layer.shrub,
+    Layer.debris,
+    Layer.enemy,
+    Layer.trap,
+    Layer.item,
+    Layer.buff,
+)
+
+
+@dataclass
+class SuspendedRoom:
+    """
+    A recently left room with its sprites detached from the game's layers,
+    along with the tile map, nav grid and template they belong to
+    """
+    sprites: pg.sprite.LayeredUpdates
+    level: list
+    pathfinding_grid: NavGrid
+    template: RoomTemplate
+
+
 @dataclass
 class GamePlaying(GameLoop):
     layers: pg.sprite.LayeredUpdates
@@ -57,11 +86,16 @@ class GamePlaying(GameLoop):
     pathfinding_grid: []
     map_manager: Map
     show_map: bool
-    level_position: List[int] = field(default_factory=lambda: [19, 19])
+    scheduler: TaskScheduler
+    prefetcher: RoomPrefetcher
+    template: Optional[RoomTemplate] = None
+    suspended_rooms: OrderedDict = field(default_factory=OrderedDict)
+    suspended_limit: int = SUSPENDED_ROOMS
+    level_position: List[int] = field(default_factory=lambda: list(STARTING_POSITION))
 
     @classmethod
     def create(cls, game):
-        layers = pg.sprite.LayeredUpdates()
+        layers = ActiveLayeredUpdates()
         return cls(
             game=game,
             background=create_surface(),
@@ -71,6 +105,8 @@ class GamePlaying(GameLoop):
             map_manager=Map(),
             pathfinding_grid=None,
             show_map=False,
+            scheduler=TaskScheduler(),
+            prefetcher=RoomPrefetcher(),
             sprite_manager=SpriteManager(
                 sprites=pg.sprite.LayeredUpdates(),
                 layers=layers,
@@ -106,54 +142,82 @@ class GamePlaying(GameLoop):
         self.player_group.spawn_player()
         self.player_group.spawn_default_hearts()
         self.text_group.menu = self.sprite_manager.create_menu(index="stats_display", position=[-420, 220])
+        self.scheduler.add_recurring("enemy_perception", self.enemy_group.perception, AI_INTERVAL)
+        self.scheduler.add_recurring("item_attraction", self.item_chase, AI_INTERVAL)
 
     def draw_background(self):
         self.background.blit(IMAGE_SPRITES[(False, False, "edit_background")], (0, 0))
+        doors = self.level.is_door()
+        walls = self.level.is_wall()
         for (y, x, dx, dy) in tile_positions():
-            background_tile = self.level[y][x]
-            if background_tile.index in DOORS:
-                self.sprite_manager.create_door(
-                    position=(dx, dy),
-                    index=background_tile.index,
-                    orientation=background_tile.orientation,
-                )
-            elif background_tile.index in WALLS:
-                self.sprite_manager.create_wall(
-                    position=(dx, dy),
-                    index=background_tile.index,
-                    orientation=background_tile.orientation,
-                )
+            if doors[y, x]:
+                create = self.sprite_manager.create_door
+            elif walls[y, x]:
+                create = self.sprite_manager.create_wall
             else:
-                self.sprite_manager.create_background(
-                    position=(dx, dy),
-                    index=background_tile.index,
-                    orientation=background_tile.orientation,
-                )
+                create = self.sprite_manager.create_background
+            create(
+                position=(dx, dy),
+                index=self.level.index(y, x),
+                orientation=self.level.orientation(y, x),
+            )
 
-    def generate_map(self):
+    @property
+    def seed(self) -> int:
+        """
+        Seed of the current run's map, which regenerates the same dungeon when passed to generate_map
+        """
+        return self.map_manager.seed
+
+    def generate_map(self, seed=None):
+        """
+        Generates a fresh map for a new run from `seed`, or from a random seed if none is given
+        """
+        self.prefetcher.clear()
+        self.clear_suspended_rooms()
+        self.map_manager.saved_states.close()
+        self.map_manager = Map(seed=seed)
         self.map_manager.generate_map()
+        self.level_position = list(self.map_manager.start)
 
     def determine_level(self) -> None:
         """
         Uses the map_logic grid to determine the level being moved into
-        If the level has been previously visited it will have a saved state in "saved_state" of the grid
+        If the level has been previously visited it will have a saved state in the map's saved_states,
+        kept as a `RoomDelta` against the level's template
+        Rooms left recently are swapped back in from their suspended sprites, rooms prepared in the
+        background by the prefetcher are used when ready, and the rooms connected to the new level
+        are queued for preparing once it is loaded
         """
-        if self.map_manager.map_grid[self.level_position[0]][self.level_position[1]]["saved_state"]:
-            data = self.map_manager.map_grid[self.level_position[0]][self.level_position[1]]["saved_state"]
+        position = tuple(self.level_position)
+        saved_states = self.map_manager.saved_states
+        suspended = self.suspended_rooms.pop(position, None)
+        room = None if suspended is not None else self.prefetcher.take(position, saved_states.peek(position))
+        if suspended is not None:
+            self.resume_room(suspended)
+        elif room is not None:
+            if room.saved_state is not None:
+                # Entering the room counts as a use of its saved state, as loading it would
+                saved_states[position] = room.delta
+            self.template = room.delta.template
             self.load_level(
-                background=data["background"],
-                shrubs=data["shrubs"],
-                enemies=data["enemies"],
-                traps=data["traps"],
-                buffs=data["buffs"],
-                items=data["items"],
+                background=room.data["background"],
+                shrubs=room.data["shrubs"],
+                enemies=room.data["enemies"],
+                traps=room.data["traps"],
+                buffs=room.data["buffs"],
+                items=room.data["items"],
+                tile_map=room.tile_map,
+                static_grid=room.static_grid,
             )
+        elif position in saved_states:
+            self.open_room(saved_states[position])
         else:
-            level = self.map_manager.map_grid[self.level_position[0]][self.level_position[1]]["level"]
-            self.open_level(import_level(level + ".json"))
+            self.open_template(room_template(self.map_manager.level_at(self.level_position)))
+        self.prefetcher.prefetch(self.map_manager, position, skip=self.suspended_rooms)
 
     def change_level(self, direction="start"):
-        previous_position = self.map_manager.map_grid[self.level_position[0]][self.level_position[1]]["position"]
+        previous_position = tuple(self.level_position)
 
         match direction:
             case "up":
@@ -175,21 +239,83 @@ class GamePlaying(GameLoop):
             case "start":
                 pass
 
-        if direction != "start":
-            self.map_manager.map_grid[previous_position[0]][previous_position[1]]["saved_state"] = save_level(
-                self.level,
-                self.layers.get_sprites_from_layer(Layer.shrub.value) +
-                self.layers.get_sprites_from_layer(Layer.debris.value),
-                self.layers.get_sprites_from_layer(Layer.enemy.value),
-                self.layers.get_sprites_from_layer(Layer.trap.value),
-                self.layers.get_sprites_from_layer(Layer.buff.value),
-                self.layers.get_sprites_from_layer(Layer.item.value),
-                return_directly=True,
-            )
+        if direction != "start" and self.template is not None:
+            self.suspend_room(previous_position)
         self.determine_level()
 
+    def suspend_room(self, position):
+        """
+        Saves the state of the current room at map `position`, then detaches its sprites from the game's layers
+        and keeps them, with its tile map and nav grid, for resuming the room unchanged. The least recently
+        left room is dropped once more than `suspended_limit` rooms are suspended, its saved state remains.
+        Enemies killed since the last perception pass die first, as resuming only picks up living enemies.
+        """
+        self.enemy_group.handle_deaths()
+        self.map_manager.saved_states[position] = RoomDelta.capture(
+            self.template,
+            {
+                "shrubs": self.layers.get_sprites_from_layer(Layer.shrub.value) +
+                self.layers.get_sprites_from_layer(Layer.debris.value),
+                "enemies": self.layers.get_sprites_from_layer(Layer.enemy.value),
+                "traps": self.layers.get_sprites_from_layer(Layer.trap.value),
+                "buffs": self.layers.get_sprites_from_layer(Layer.buff.value),
+                "items": self.layers.get_sprites_from_layer(Layer.item.value),
+            },
+        )
+        sprites = pg.sprite.LayeredUpdates()
+        for layer in ROOM_LAYERS:
+            sprites.add(*self.layers.remove_sprites_of_layer(layer), layer=layer)
+        self.suspended_rooms[position] = SuspendedRoom(
+            sprites=sprites,
+            level=self.level,
+            pathfinding_grid=self.pathfinding_grid,
+            template=self.template,
+        )
+        while len(self.suspended_rooms) > self.suspended_limit:
+            _, dropped = self.suspended_rooms.popitem(last=False)
+            dropped.sprites.empty()
+
+    def resume_room(self, room):
+        """
+        Swaps the sprites of a suspended `room` back into the game's layers
+        """
+        self.curated_sprite_removal()
+        for layer in room.sprites.layers():
+            self.layers.add(*room.sprites.get_sprites_from_layer(layer), layer=layer)
+        room.sprites.empty()
+        self.level = room.level
+        self.template = room.template
+        self.pathfinding_grid = room.pathfinding_grid
+        self.enemy_group.clear_entities()
+        self.enemy_group.add_entities(
+            self.layers.get_sprites_from_layer(Layer.enemy),
+            self.layers.get_sprites_from_layer(Layer.wall),
+            self.player_group.player,
+            self.pathfinding_grid
+        )
+        self.scheduler.restart()
+        self.text_group.define_initial_texts()
+
+    def clear_suspended_rooms(self):
+        for room in self.suspended_rooms.values():
+            room.sprites.empty()
+        self.suspended_rooms.clear()
+
     def open_level(self, file_obj):
-        data = json.loads(file_obj.read())
+        self.open_template(template_from_file(file_obj))
+
+    def open_template(self, template):
+        """
+        Loads a fresh room from the parsed level `template`
+        """
+        self.open_room(RoomDelta(template))
+
+    def open_room(self, delta):
+        """
+        Loads a room from its template with the saved `delta` applied
+        """
+        self.template = delta.template
+        data = delta.level_data()
         self.load_level(
             background=data["background"],
             shrubs=data["shrubs"],
@@ -199,13 +325,15 @@ class GamePlaying(GameLoop):
             items=data["items"],
         )
 
-    def load_level(self, background, shrubs, enemies, traps, buffs, items):
+    def load_level(self, background, shrubs, enemies, traps, buffs, items, tile_map=None, static_grid=None):
         """
         Given a valid tile map of `background` tiles, and a list
         of `shrubs`, load them into the game and reset the game.
+        A `tile_map` and `static_grid` already built from `background` are used as is.
         """
         self.curated_sprite_removal()
-        self.level = create_background_tile_map(background)
+        room_random = self.map_manager.room_random(self.level_position)
+        self.level = tile_map if tile_map is not None else Tilemap.from_raw(background)
         self.draw_background()
         for shrub in shrubs:
             if shrub["index"] in DEBRIS:
@@ -214,6 +342,7 @@ class GamePlaying(GameLoop):
                         position=shrub["position"],
                         orientation=shrub["orientation"],
                         index=shrub["index"],
+                        spawn_id=shrub.get("spawn_id"),
                     )
                 )
             else:
@@ -222,6 +351,7 @@ class GamePlaying(GameLoop):
                         position=shrub["position"],
                         orientation=shrub["orientation"],
                         index=shrub["index"],
+                        spawn_id=shrub.get("spawn_id"),
                     )
                 )
             self.sprite_manager.place(shrub["position"])
@@ -231,6 +361,7 @@ class GamePlaying(GameLoop):
                     position=enemy["position"],
                     orientation=enemy["orientation"],
                     index=enemy["index"],
+                    spawn_id=enemy.get("spawn_id"),
                 )
             )
             self.sprite_manager.place(enemy["position"])
@@ -239,7 +370,8 @@ class GamePlaying(GameLoop):
                 self.sprite_manager.create_buff(
                     position=buff["position"],
                     target=self.player_group.player,
-                    index=random.choice(ALLOWED_BUFFS) if buff["index"] == "random" else buff["index"],
+                    index=room_random.choice(ALLOWED_BUFFS) if buff["index"] == "random" else buff["index"],
+                    spawn_id=buff.get("spawn_id"),
                 )
             )
             self.sprite_manager.place(buff["position"])
@@ -249,6 +381,7 @@ class GamePlaying(GameLoop):
                     position=trap["position"],
                     orientation=trap["orientation"],
                     index=trap["index"],
+                    spawn_id=trap.get("spawn_id"),
                 )
             )
             self.sprite_manager.place(trap["position"])
@@ -257,12 +390,13 @@ class GamePlaying(GameLoop):
                 self.sprite_manager.create_item(
                     position=item["position"],
                     index=item["index"],
+                    spawn_id=item.get("spawn_id"),
                     target=self.player_group.player,
                 )
             )
             self.sprite_manager.place(item["position"])
-        if self.pathfinding_grid:
-            Grid.cleanup(self.pathfinding_grid)
+        self.pathfinding_grid = NavGrid(static_grid if static_grid is not None else define_grid(self.level))
+        self.stamp_obstacles()
         if self.enemy_group.obstacles:
             self.enemy_group.clear_entities()
         self.enemy_group.add_entities(
@@ -271,43 +405,54 @@ class GamePlaying(GameLoop):
             self.player_group.player,
             self.pathfinding_grid
         )
-        self.pathfinding_grid = define_grid(self.level)
+        self.scheduler.restart()
         self.text_group.define_initial_texts()
 
+    def stamp_obstacles(self):
+        """
+        Stamps debris and blocking shrubs into the nav grid so enemies path around them
+        """
+        for debri in self.layers.get_sprites_from_layer(Layer.debris):
+            self.pathfinding_grid.stamp(debri, debri.rect)
+        for shrub in self.layers.get_sprites_from_layer(Layer.shrub):
+            if shrub.flags & IS_BLOCKING:
+                self.pathfinding_grid.stamp(shrub, shrub.rect)
+
     def create_blank_level(self):
         """
         Creates a blank level with a uniform tile selection.
         """
-        self.load_level(create_tile_map({"index": "blank", "orientation": 0}), [])
+        self.load_level(None, [], [], [], [], [], tile_map=Tilemap.filled("blank"))
 
     def draw(self):
         self.screen.blit(self.background, (0, 0))
+        CLOCK.advance()
+        ENTITIES.advance_motion()
+        ENTITIES.animate(CLOCK.tick)
         self.layers.update()
+        self.enemy_group.tick()
         self.layers.draw(self.screen)
         self.special_effects.draw()
         if self.show_map:
             self.display_map()
 
     def display_map(self):
-        position = self.map_manager.map_grid[self.level_position[1]][self.level_position[0]]["position"]
+        row, column = self.level_position
         starting_corner = (
-            self.map_display.get_bounding_rect().center[1] - (position[1] * 90) - 25,
-            self.map_display.get_bounding_rect().center[0] - (position[0] * 90)
+            self.map_display.get_bounding_rect().center[1] - (row * 90) - 25,
+            self.map_display.get_bounding_rect().center[0] - (column * 90)
         )
 
         self.map_display.blit(IMAGE_SPRITES[(False, False, "map_display")], (0, 0))
-        for row in self.map_manager.map_grid:
-            for tile in row:
-                if tile["level"] == "blank":
-                    continue
-                connection = LEVEL_CONNECTIONS[tile["level"]]["connection"]
-                self.map_display.blit(
-                    CONNECTION_MATCH[connection],
-                    (
-                        starting_corner[1] + (tile["position"][1] * 90) - 45,
-                        starting_corner[0] + (tile["position"][0] * 90) - 45
-                    )
+        for position, level in self.map_manager.rooms():
+            connection = LEVEL_CONNECTIONS[level]["connection"]
+            self.map_display.blit(
+                CONNECTION_MATCH[connection],
+                (
+                    starting_corner[1] + (position[1] * 90) - 45,
+                    starting_corner[0] + (position[0] * 90) - 45
                 )
+            )
         self.map_display.blit(IMAGE_SPRITES[(False, False, "map_you_are_here")], (525, 282))
         self.screen.blit(self.map_display, (370, 190))
         self.screen.blit(IMAGE_SPRITES[(False, False, "map_border")], (300, 125))
@@ -333,7 +478,6 @@ class GamePlaying(GameLoop):
                     pass
 
     def loop(self):
-        loop_counter = 0
         clock = pg.time.Clock()
         text_layer = pg.sprite.Group(*self.text_group.text_sprites)
         self.special_effects.screen_sync(screen=self.screen)
@@ -343,9 +487,7 @@ class GamePlaying(GameLoop):
             self.update_text_values()
             self.handle_events()
             self.handle_collision()
-            if loop_counter % 10 == 0:
-                self.enemy_group.update()
-                self.item_chase()
+            self.scheduler.run()
             self.player_group.update()
             self.draw()
             text_layer.draw(self.screen)
@@ -353,7 +495,6 @@ class GamePlaying(GameLoop):
             pg.display.flip()
             clock.tick(DESIRED_FPS)
             pg.display.set_caption(f"FPS {round(clock.get_fps())}")
-            loop_counter += 1
         self.layers.empty()
 
     def handle_event(self, event):
@@ -454,7 +595,7 @@ class GamePlaying(GameLoop):
         for enemies, doors in collide_mask(enemies, doors):
             for enemy in [enemies]:
                 enemy.path = None
-                enemy.move(enemy.position_history.pop(-1))
+                enemy.move(enemy.position_history.pop())
                 enemy.movement_cooldown_remaining = 0
 
     def collision_enemy_wall(self):
@@ -467,18 +608,15 @@ class GamePlaying(GameLoop):
                 if enemy.state == SpriteState.pathfinding:
                     continue
                 if enemy.movement in (MovementType.chase, MovementType.ranged_chase):
-                    enemy.path = self.enemy_group.find_pathfinding_path(
-                        enemy.rect.center,
-                        self.player_group.player.rect.center,
-                        self.pathfinding_grid,
-                        enemy.speed,
-                    )
-                    enemy.animation_state = AnimationState.walking
+                    enemy.path = None
                     enemy.state = SpriteState.pathfinding
-                    enemy.final_position = self.player_group.player.rect.center
+                    self.scheduler.add_once(
+                        "path_request",
+                        self.enemy_group.path_request(enemy, self.player_group.player.rect.center),
+                    )
                 if enemy.movement in (MovementType.wander_chase, MovementType.wander):
                     enemy.path = None
-                    enemy.move(enemy.position_history.pop(-1))
+                    enemy.move(enemy.position_history.pop())
                     enemy.movement_cooldown_remaining = enemy.movement_cooldown - enemy.movement_cooldown_remaining
 
     def collision_player_enemy(self):
@@ -553,6 +691,7 @@ class GamePlaying(GameLoop):
         for player, debris in collide_mask(player, debris):
             for debri in debris:
                 debri.animation_state = AnimationState.dying
+                self.pathfinding_grid.unstamp(debri)
 
     def collision_projectile_debris(self):
         projectiles = self.layers.get_sprites_from_layer(Layer.projectile)
@@ -563,6 +702,7 @@ class GamePlaying(GameLoop):
                     if debri.animation_state != AnimationState.dying:
                         projectile.animation_state = AnimationState.exploding
                 debri.animation_state = AnimationState.dying
+                self.pathfinding_grid.unstamp(debri)
                 self.layers.change_layer(debri, Layer.shrub)
 
     def game_over_check(self):
@@ -570,11 +710,15 @@ class GamePlaying(GameLoop):
             self.set_state(GameState.game_over)
 
     def item_chase(self):
+        """
+        Generator attracting a single item towards the player per step
+        """
         items = self.layers.get_sprites_from_layer(Layer.item)
-        player = self.layers.get_sprites_from_layer(Layer.player)
+        player = self.player_group.player
         for item in items:
-            if range_check(item.rect.center, player[0].rect.center, 250):
-                item.direct_movement(player[0].rect.center)
+            if item.alive() and range_check(item.rect.center, player.rect.center, 250):
+                item.direct_movement(player.rect.center)
+            yield
 
     def curated_sprite_removal(self):
         for group in Layer:
@@ -158,7 +158,7 @@ def connection_match_builder():
 
 
 @contextmanager
-def open_dialog(title="Open file...", filetypes=(("Tower Defense Levels", "*json"),)):
+def open_dialog(title="Open file...", filetypes=(("Tower Defense Levels", "*json *.dclv"),)):
     """
     Context manager that yields the opened file, which could be
     None if the user exits it without selecting. If there is a file it
@@ -174,7 +174,7 @@ def open_dialog(title="Open file...", filetypes=(("Tower Defense Levels", "*json
 
 
 @contextmanager
-def save_dialog(title="Save file...", filetypes=(("Tower Defense Levels", "*.json"),)):
+def save_dialog(title="Save file...", filetypes=(("Tower Defense Levels", "*.json"), ("Binary Levels", "*.dclv"))):
     f = tkinter.filedialog.asksaveasfile(title=title, filetypes=filetypes)
     try:
         yield f
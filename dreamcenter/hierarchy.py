@@ -0,0 +1,194 @@
+import heapq
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from dreamcenter.templates import room_template
+from dreamcenter.constants import (
+    LEVEL_CONNECTIONS,
+    DOORS,
+    TILE_WIDTH,
+    TILE_HEIGHT,
+    TILES_X,
+    TILES_Y,
+)
+from dreamcenter.path_finding import walkable_matrix, distance_field, CELL_SIZE
+
+# Door sides in the order used by LEVEL_CONNECTIONS connection tuples
+SIDES = ("up", "right", "down", "left")
+OPPOSITE = {"up": "down", "right": "left", "down": "up", "left": "right"}
+# Map grid (row, column) offset of the room behind each door side
+SIDE_OFFSETS = {"up": (-1, 0), "right": (0, 1), "down": (1, 0), "left": (0, -1)}
+
+
+def door_side(x, y) -> Optional[str]:
+    """
+    Determines which side of the room a door tile at grid tile (x, y) leads to,
+    using the same screen edge thresholds as the player door collision
+    """
+    center_x, center_y = x * TILE_WIDTH + TILE_WIDTH / 2, y * TILE_HEIGHT + TILE_HEIGHT / 2
+    if center_x < TILE_WIDTH:
+        return "left"
+    if center_x > (TILES_X - 1) * TILE_WIDTH:
+        return "right"
+    if center_y < TILE_HEIGHT:
+        return "up"
+    if center_y > (TILES_Y - 1) * TILE_HEIGHT:
+        return "down"
+    return None
+
+
+@dataclass(frozen=True)
+class RoomDoors:
+    """
+    Door layout of a room template with the walking distance in pixels between every pair of doors
+    """
+    level: str
+    doors: Dict[str, Tuple[Tuple[int, int], ...]]
+    distances: Dict[Tuple[str, str], float]
+
+    def distance(self, side_a, side_b) -> float:
+        if side_a == side_b:
+            return 0.0
+        return self.distances.get((side_a, side_b), math.inf)
+
+
+def room_doors_from_background(level, background) -> RoomDoors:
+    """
+    Finds the nav grid cells of every door in a raw background tile map and floods
+    the nav grid from each door to measure door to door distances
+    """
+    walkable = walkable_matrix([[tile["index"] for tile in row] for row in background])
+    doors = {}
+    for y, row in enumerate(background):
+        for x, tile in enumerate(row):
+            if tile["index"] not in DOORS:
+                continue
+            side = door_side(x, y)
+            if side is None:
+                continue
+            doors.setdefault(side, []).extend(
+                (x * 2 + quadrant_x, y * 2 + quadrant_y) for quadrant_y in (0, 1) for quadrant_x in (0, 1)
+            )
+    distances = {}
+    for side, cells in doors.items():
+        flood = distance_field(walkable, cells)
+        for other_side, other_cells in doors.items():
+            if other_side == side:
+                continue
+            distances[(side, other_side)] = float(min(flood[y, x] for x, y in other_cells)) * CELL_SIZE
+    return RoomDoors(
+        level=level,
+        doors={side: tuple(cells) for side, cells in doors.items()},
+        distances=distances,
+    )
+
+
+@lru_cache(maxsize=None)
+def room_doors(level) -> RoomDoors:
+    """
+    Door to door distances of the room template `level`, computed once per process
+    """
+    return room_doors_from_background(level, room_template(level).background())
+
+
+@dataclass
+class DungeonGraph:
+    """
+    Abstract graph over the generated dungeon for long range queries without tile level search.
+
+    Nodes are (row, column, side) doors. Doors inside a room are joined by the precomputed
+    template distances and facing doors of neighbouring rooms are joined at no cost, following
+    the connections of LEVEL_CONNECTIONS.
+    """
+    rooms: Dict[Tuple[int, int], str]
+    edges: Dict[Tuple[int, int, str], list] = field(default_factory=dict)
+
+    @classmethod
+    def from_map(cls, map_manager) -> "DungeonGraph":
+        graph = cls(rooms=dict(map_manager.rooms()))
+        graph.build()
+        return graph
+
+    def sides(self, room):
+        connection = LEVEL_CONNECTIONS[self.rooms[room]]["connection"]
+        return [side for side, open_ in zip(SIDES, connection) if open_]
+
+    def build(self) -> None:
+        for room, level in self.rooms.items():
+            doors = room_doors(level)
+            sides = self.sides(room)
+            for side in sides:
+                node = (*room, side)
+                self.edges[node] = [
+                    ((*room, other), doors.distance(side, other)) for other in sides if other != side
+                ]
+                row, column = room[0] + SIDE_OFFSETS[side][0], room[1] + SIDE_OFFSETS[side][1]
+                if (row, column) in self.rooms and OPPOSITE[side] in self.sides((row, column)):
+                    self.edges[node].append(((row, column, OPPOSITE[side]), 0.0))
+
+    def search(self, room, side):
+        """
+        Dijkstra over the door graph from door `side` of `room`.
+        Yields (distance, node, first door node on the way) in order of distance.
+        """
+        origin = (*room, side)
+        distances = {origin: 0.0}
+        first_hops = {origin: origin}
+        open_heap = [(0.0, origin)]
+        while open_heap:
+            distance, node = heapq.heappop(open_heap)
+            if distance > distances[node]:
+                continue
+            yield distance, node, first_hops[node]
+            for neighbour, cost in self.edges.get(node, ()):
+                if distance + cost < distances.get(neighbour, math.inf):
+                    distances[neighbour] = distance + cost
+                    first_hops[neighbour] = neighbour if node == origin else first_hops[node]
+                    heapq.heappush(open_heap, (distance + cost, neighbour))
+
+    def door_distance(self, room, side, target_room) -> float:
+        """
+        Walking distance in pixels from door `side` of `room` to the nearest door of `target_room`
+        """
+        for distance, node, _ in self.search(room, side):
+            if node[:2] == tuple(target_room):
+                return distance
+        return math.inf
+
+    def distance_to_type(self, room, side, room_type="shop") -> Tuple[float, Optional[Tuple[int, int]]]:
+        """
+        Distance from door `side` of `room` to the nearest other room of `room_type`
+        in LEVEL_CONNECTIONS, along with that room's position
+        """
+        for distance, node, _ in self.search(room, side):
+            target = node[:2]
+            if target != tuple(room) and LEVEL_CONNECTIONS[self.rooms[target]]["type"] == room_type:
+                return distance, target
+        return math.inf, None
+
+    def next_door(self, room, side, target_room) -> Optional[str]:
+        """
+        Side of `room` to leave through when heading from its door `side` towards `target_room`
+        """
+        for _, node, first_hop in self.search(room, side):
+            if node[:2] == tuple(target_room):
+                # Walk back along the first hops until the last door inside `room`
+                return first_hop[2] if first_hop[:2] == tuple(room) else side
+        return None
+
+    def room_distances(self, room) -> Dict[Tuple[int, int], int]:
+        """
+        Number of doors passed from `room` to every connected room, for room distance aware generation
+        """
+        hops = {tuple(room): 0}
+        queue = deque([tuple(room)])
+        while queue:
+            current = queue.popleft()
+            for side in self.sides(current):
+                neighbour = (current[0] + SIDE_OFFSETS[side][0], current[1] + SIDE_OFFSETS[side][1])
+                if neighbour in self.rooms and neighbour not in hops:
+                    hops[neighbour] = hops[current] + 1
+                    queue.append(neighbour)
+        return hops
@@ -16,6 +16,6 @@ def import_sound(asset_name: str):
         return pg.mixer.Sound(resource)
 
 
-def import_level(asset_name: str):
+def import_level(asset_name: str, mode="r"):
     with load("dreamcenter.assets.levels", asset_name) as resource:
-        return resource.open()
+        return resource.open(mode)
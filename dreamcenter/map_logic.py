@@ -1,16 +1,88 @@
 import random
+import numpy as np
+from collections import deque
 from dataclasses import dataclass, field
-from dreamcenter.constants import LEVEL_CONNECTIONS, MAP_GRID_UPPER_MAX
+from typing import Optional
+from dreamcenter.constants import (
+    LEVEL_CONNECTIONS,
+    MAP_GRID_UPPER_MAX,
+    STARTING_POSITION,
+    SPECIAL_ROOM_MIN_DISTANCE,
+)
+from dreamcenter.room_states import RoomStateStore
+from dreamcenter.hierarchy import DungeonGraph
+
+# Level ids used by the map arrays, 0 is an empty cell
+LEVEL_NAMES = ("blank", *LEVEL_CONNECTIONS)
+LEVEL_IDS = {name: level_id for level_id, name in enumerate(LEVEL_NAMES)}
+BLANK = LEVEL_IDS["blank"]
+# Random rooms tried when looking for space to sprout a new branch before scanning the whole grid
+SPROUT_PROBES = 16
+
+# Connection schema (up, right, down, left) packed into 4 bits, up being the lowest
+CARDINALS = ((-1, 0), (0, 1), (1, 0), (0, -1))
+MASK_BITS = tuple(1 << bit for bit in range(len(CARDINALS)))
+
+
+def connection_mask(connections) -> int:
+    return sum(bit for bit, connected in zip(MASK_BITS, connections) if connected)
+
+
+# Connection mask of every level id, 0 for blank
+LEVEL_MASKS = np.array(
+    [0] + [connection_mask(value["connection"]) for value in LEVEL_CONNECTIONS.values()], dtype=np.uint8
+)
+# Connection mask -> level ids with that connection schema, optionally limited to a type
+MASK_LEVELS = {
+    mask: tuple(LEVEL_IDS[name] for name in LEVEL_CONNECTIONS if LEVEL_MASKS[LEVEL_IDS[name]] == mask)
+    for mask in range(1 << len(CARDINALS))
+}
+TYPE_MASK_LEVELS = {
+    (level_type, mask): tuple(
+        level_id for level_id in levels if LEVEL_CONNECTIONS[LEVEL_NAMES[level_id]]["type"] == level_type
+    )
+    for level_type in {value["type"] for value in LEVEL_CONNECTIONS.values()}
+    for mask, levels in MASK_LEVELS.items()
+}
+
 
 @dataclass
 class Map:
+    """
+    Dungeon layout stored as arrays indexed [row, column] with a blank border of one cell,
+    so neighbour lookups at the edges never wrap around.
+
+    `levels` holds level ids (see LEVEL_NAMES), `growth` the rooms still to be grown
+    from a cell and `connections` the 4 bit connection mask of every room.
+    Saved room states are kept per (row, column) position in the `saved_states` store.
+
+    The map is `size` rooms square and grows from the `start` position.
+    All randomness comes from `rng`, seeded with `seed`, so the same seed always
+    generates the same map. A random seed is picked if none is given.
+    """
     end_points: list = field(default_factory=list)
     seed_amt: int = field(default=32)
-    map_grid: list[list[dict]] = field(default_factory=list)
+    size: int = MAP_GRID_UPPER_MAX
+    start: tuple = STARTING_POSITION
+    seed: Optional[int] = None
+    rng: random.Random = None
+    levels: np.ndarray = field(init=False, default=None)
+    growth: np.ndarray = field(init=False, default=None)
+    connections: np.ndarray = field(init=False, default=None)
+    frontier: deque = field(init=False, default_factory=deque)
+    leftover_growth: int = field(init=False, default=0)
+    placed: list = field(init=False, default_factory=list)
+    taken: set = field(init=False, default_factory=set)
+    bucket_random: np.random.Generator = field(init=False, default=None)
+    saved_states: RoomStateStore = field(init=False, default_factory=RoomStateStore)
 
     def __post_init__(self):
+        if self.seed is None:
+            self.seed = random.getrandbits(32)
+        if self.rng is None:
+            self.rng = random.Random(self.seed)
         self.create_blank_grid()
-        self.map_grid[19][19]["level"] = "4_way"
+        self.levels[self.cell(self.start)] = LEVEL_IDS["4_way"]
 
     def set_starting_growth(self, growth) -> None:
         """
@@ -18,77 +90,140 @@ class Map:
         """
         self.seed_amt = growth
 
-    def create_blank_grid(self) -> None:
+    @staticmethod
+    def cell(grid_pos) -> tuple:
         """
-        Creates a blank map of {"level": "blank", "growth": 0, "position": (row, column)} for size of grid
+        Array index of map position (row, column), accounting for the border
         """
-        for row in range(MAP_GRID_UPPER_MAX):
-            _temp_column = []
-            for column in range(MAP_GRID_UPPER_MAX):
-                _temp_column.append({"level": "blank", "growth": 0, "position": (row, column), "saved_state": {}})
-            self.map_grid.append(_temp_column)
-        self.map_grid[19][19]["growth"] = self.seed_amt
+        return grid_pos[0] + 1, grid_pos[1] + 1
 
-    def check_cardinals(self, grid_pos) -> bool:
+    def create_blank_grid(self) -> None:
         """
-        Returns true if more than 1 of the 4 positions around grid_pos have a growth greater than 0
+        Creates blank level, growth and connection arrays for the size of grid
         """
-        counter = 0
-
-        for x, y in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-            try:
-                if self.map_grid[grid_pos[0] + x][grid_pos[1] + y]["growth"] > 0 \
-                        or self.map_grid[grid_pos[0] + x][grid_pos[1] + y]["level"] != "blank":
-                    counter += 1
-            except IndexError:
-                pass
+        shape = (self.size + 2, self.size + 2)
+        self.levels = np.full(shape, BLANK, dtype=np.uint8)
+        self.growth = np.zeros(shape, dtype=np.int32)
+        self.connections = np.zeros(shape, dtype=np.uint8)
+        self.saved_states.close()
+        self.growth[self.cell(self.start)] = self.seed_amt
+        self.frontier = deque([self.cell(self.start)])
+        self.leftover_growth = 0
+        self.placed = []
+        # Cells holding a room or growth, mirrored from the arrays for fast lookups while growing
+        self.taken = {self.cell(self.start)}
 
-        return True if counter > 1 else False
+    def is_occupied(self, row, column) -> bool:
+        return (row, column) in self.taken
 
-    def distribute_growth(self, grid_pos) -> None:
+    def check_cardinals(self, cell) -> bool:
         """
-        Function handles giving the growth value it holds to the surrounding cells.
-        A growth value of 1 is considered a dead end
-        Growth value becomes 0 after tile index assignment
+        Returns true if more than 1 of the 4 cells around array cell `cell` have growth or a room.
+        Growing asks this of a handful of cells at a time, one cell after another in random order,
+        so it stays a lookup in `taken`. Keeping neighbour count arrays up to date instead costs
+        a few numpy calls per grown cell, more than these lookups, while whole grid neighbour sums
+        are only worth it for `scan_open_cells`, which looks at every cell at once.
         """
-        tiles = []
-        growth_amt = self.map_grid[grid_pos[0]][grid_pos[1]]["growth"]
+        taken = self.taken
+        return sum((cell[0] + dy, cell[1] + dx) in taken for dy, dx in CARDINALS) > 1
 
-        # Collects all of the surrounding tiles and saves them into 'tiles'
-        for x, y in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-            try:
-                tiles.append(self.map_grid[grid_pos[0] + x][grid_pos[1] + y])
-            except IndexError:
-                pass
+    def open_cells(self, cell) -> list:
         """
-        Removes tiles from 'tiles' based on the criteria:
+        Collects the cells around array cell `cell` that can be grown into, excluding cells:
+        On the border, which lie outside of the map
         Having growth, which indicates running into another branch's growth space
         Not being blank, which indicates running into another branch
         Check cardinals function, see function for details
         """
-        for tile in tiles.copy():
-            if tile["growth"] != 0 or \
-                    tile["level"] != "blank" or \
-                    self.check_cardinals((tile["position"][0], tile["position"][1])):
-                tiles.remove(tile)
+        height, width = self.growth.shape
+        return [
+            (cell[0] + dy, cell[1] + dx)
+            for dy, dx in ((1, 0), (0, 1), (-1, 0), (0, -1))
+            if 0 < cell[0] + dy < height - 1 and 0 < cell[1] + dx < width - 1
+            and not self.is_occupied(cell[0] + dy, cell[1] + dx)
+            and not self.check_cardinals((cell[0] + dy, cell[1] + dx))
+        ]
+
+    def distribute_growth(self, cell) -> None:
+        """
+        Function handles giving the growth value it holds to the surrounding cells.
+        A growth value of 1 is considered a dead end
+        Growth value becomes 0 after tile index assignment
+        """
+        growth_amt = int(self.growth[cell])
+        tiles = self.open_cells(cell)
 
-        #
         if len(tiles) == 0:
-            self.redistribute_growth(growth_amt)
+            self.redistribute_growth(growth_amt - 1)
         elif len(tiles) == 1:
-            tiles[0]["growth"] = growth_amt - 1
+            self.grow(tiles[0], growth_amt - 1)
         else:
-            growth_amt -= 1
-            for i in range(growth_amt):
-                bucket = random.randint(0, len(tiles)-1)
-                tiles[bucket]["growth"] += 1
+            # Every remaining unit of growth lands in a random bucket
+            amounts = self.bucket_random.multinomial(growth_amt - 1, [1 / len(tiles)] * len(tiles))
+            for tile, amount in zip(tiles, amounts.tolist()):
+                if amount:
+                    self.grow(tile, amount)
+
+    def grow(self, cell, amount) -> None:
+        """
+        Gives `amount` growth to array cell `cell` and adds it to the frontier
+        """
+        self.growth[cell] = amount
+        self.taken.add(cell)
+        self.frontier.append(cell)
 
     def redistribute_growth(self, amount) -> None:
         """
         Distributes left over growth to valid tiles.
-        Is triggered when function distribute_growth has nowhere to place its values
+        Is triggered when function distribute_growth has nowhere to place its values.
+        The growth is pooled and handed out by `sprout` once the frontier runs dry.
         """
-        pass
+        self.leftover_growth += amount
+
+    def sprout(self) -> bool:
+        """
+        Starts a new branch holding all left over growth from an existing room, in a blank cell
+        next to only that room, and rematches the room's level to its new connection.
+        Random rooms are probed first, falling back to a scan of the whole grid once the map
+        is too crowded for probing to find space. Returns False if there is nowhere left to grow.
+        """
+        for _ in range(SPROUT_PROBES):
+            room = self.rng.choice(self.placed)
+            tiles = self.open_cells(room)
+            if tiles:
+                break
+        else:
+            room, tiles = self.scan_open_cells()
+            if room is None:
+                return False
+        self.grow(self.rng.choice(tiles), self.leftover_growth)
+        self.leftover_growth = 0
+        mask = self.cell_mask(room)
+        self.connections[room] = mask
+        self.levels[room] = self.rng.choice(MASK_LEVELS[mask])
+        return True
+
+    def scan_open_cells(self) -> tuple:
+        """
+        Finds a random room with cells that can be grown into using neighbour counts from
+        shifted copies of the occupied cells. Returns the room and its open cells, or (None, [])
+        """
+        occupied = (self.levels != BLANK) | (self.growth > 0)
+        height, width = occupied.shape
+        counts = np.zeros(occupied.shape, dtype=np.uint8)
+        for dy, dx in CARDINALS:
+            counts[1:-1, 1:-1] += occupied[1 + dy:height - 1 + dy, 1 + dx:width - 1 + dx]
+        # The border is never counted, so it is never open
+        counts[[0, -1], :] = 0
+        counts[:, [0, -1]] = 0
+        candidates = np.argwhere(~occupied & (counts == 1))
+        if not len(candidates):
+            return None, []
+        row, column = self.rng.choice(candidates.tolist())
+        room = next(
+            (row + dy, column + dx) for dy, dx in CARDINALS if occupied[row + dy, column + dx]
+        )
+        return room, self.open_cells(room)
 
     def connection_finder(self, grid_pos) -> tuple:
         """
@@ -97,100 +232,95 @@ class Map:
         :param grid_pos: Tile position needing a connection match for
         :return: The connection schema needed
         """
-        connections = [0, 0, 0, 0]
-        counter = 0
-
-        for y, x in [(-1, 0), (0, 1), (1, 0), (0, -1)]:
-            try:
-                if self.map_grid[grid_pos[0] + y][grid_pos[1] + x]["growth"] > 0 \
-                        or self.map_grid[grid_pos[0] + y][grid_pos[1] + x]["level"] != "blank":
-                    connections[counter] = 1
-            except IndexError:
-                pass
-            counter += 1
+        row, column = self.cell(grid_pos)
+        return tuple(int(self.is_occupied(row + dy, column + dx)) for dy, dx in CARDINALS)
 
-        return tuple(connections)
+    def cell_mask(self, cell) -> int:
+        """
+        Connection mask of array cell `cell` towards its neighbours with growth or a room
+        """
+        return sum(
+            bit for bit, (dy, dx) in zip(MASK_BITS, CARDINALS) if self.is_occupied(cell[0] + dy, cell[1] + dx)
+        )
 
     @staticmethod
-    def level_matcher(connections) -> tuple:
+    def level_matcher(connections) -> list:
         """
         Matches connection tuple with levels from LEVEL_CONNECTIONS and returns a list
         """
-        matched_levels = []
-        for key, value in LEVEL_CONNECTIONS.items():
-            if connections == value["connection"]:
-                matched_levels.append(key)
-        return matched_levels
+        return [LEVEL_NAMES[level_id] for level_id in MASK_LEVELS[connection_mask(connections)]]
 
     def generate_map(self) -> None:
         """
         Handles the full building of a map
-        Continues to loop until no tile has assigned a level in the last cycle
-        """
-        growing = True
-
-        while growing:
-            growing = False
-            for row in self.map_grid:
-                for tile in row:
-                    if tile["growth"] > 1:
-                        self.distribute_growth(tile["position"])
-                    if tile["growth"] > 0:
-                        connections_found = self.connection_finder(tile["position"])
-                        levels_matched = self.level_matcher(connections_found)
-                        tile["level"] = random.choice(levels_matched)
-                        tile["growth"] = 0
-                        growing = True
+        Works through the frontier of growing cells, each handing out its growth to the cells
+        around it, which join the frontier, and then taking a level matching its connections.
+        A cell's neighbours are all known once its own growth is handed out, as new growth
+        never lands next to more than one occupied cell. Only growing cells are ever visited.
+        Growth stranded in dead ends sprouts a new branch whenever the frontier runs dry.
+        """
+        self.bucket_random = np.random.default_rng(self.rng.getrandbits(64))
+        while self.frontier or (self.leftover_growth and self.sprout()):
+            cell = self.frontier.popleft()
+            if not self.growth[cell]:
+                continue
+            if self.growth[cell] > 1:
+                self.distribute_growth(cell)
+            mask = self.cell_mask(cell)
+            self.connections[cell] = mask
+            self.levels[cell] = self.rng.choice(MASK_LEVELS[mask])
+            self.growth[cell] = 0
+            self.placed.append(cell)
 
         # Special room assignments
         self.identify_end_points()
         self.assign_special("shop")
 
+    def room_random(self, grid_pos) -> random.Random:
+        """
+        Random number generator for the contents of the room at map position (row, column),
+        derived from the map seed so rooms roll the same random contents on every run with that seed
+        """
+        return random.Random(f"{self.seed}:{grid_pos[0]}:{grid_pos[1]}")
+
+    def level_at(self, grid_pos) -> str:
+        """
+        Name of the level at map position (row, column)
+        """
+        return LEVEL_NAMES[self.levels[self.cell(grid_pos)]]
+
+    def rooms(self):
+        """
+        Yields the (row, column) position and level name of every room in the map
+        """
+        for row, column in np.argwhere(self.levels[1:-1, 1:-1] != BLANK).tolist():
+            yield (row, column), LEVEL_NAMES[self.levels[row + 1, column + 1]]
 
     def visualize_map(self) -> list:
         """
         Dev tool for generating a text map used for debugging
         """
-        visualized_map = []
-        level_count = 0
-        for row in self.map_grid:
-            temp_row = []
-            for tile in row:
-                temp_row.append(tile["level"])
-                if tile["level"] != "blank":
-                    level_count += 1
-            visualized_map.append(temp_row)
-        return visualized_map
+        return [[LEVEL_NAMES[level_id] for level_id in row] for row in self.levels[1:-1, 1:-1].tolist()]
 
     def identify_end_points(self) -> None:
         """
         Assigns all tiles in grid with only 1 connection to the end_points list
         """
-        for row in self.map_grid:
-            for tile in row:
-                try:
-                    if sum(LEVEL_CONNECTIONS[tile["level"]]["connection"]) == 1:
-                        self.end_points.append(tile["position"])
-                except KeyError:
-                    pass
+        dead_ends = np.isin(LEVEL_MASKS[self.levels[1:-1, 1:-1]], MASK_BITS)
+        self.end_points.extend(tuple(position) for position in np.argwhere(dead_ends).tolist())
 
     def assign_special(self, type) -> None:
         """
-        Chooses a random end point tile, removes it from the end point list,
-        and assigns a random level of type shop to that position
+        Chooses a random end point tile at least SPECIAL_ROOM_MIN_DISTANCE rooms from the start,
+        or among the farthest end points when none is that far, removes it from the end point list,
+        and assigns a random level of type shop to that position.
+        Distances are the doors passed from the start in the map's DungeonGraph.
         """
-        special_pool = []
-
-        grid_pos = random.choice(self.end_points)
+        hops = DungeonGraph(rooms=dict(self.rooms())).room_distances(self.start)
+        distance = min(SPECIAL_ROOM_MIN_DISTANCE, max(hops.get(grid_pos, 0) for grid_pos in self.end_points))
+        grid_pos = self.rng.choice([grid_pos for grid_pos in self.end_points if hops.get(grid_pos, 0) >= distance])
         self.end_points.remove(grid_pos)
 
-        for level in LEVEL_CONNECTIONS:
-            # Exclude any levels not of type shop
-            if LEVEL_CONNECTIONS[level]["type"] != type:
-                continue
-
-            if LEVEL_CONNECTIONS[level]["connection"] == \
-                    LEVEL_CONNECTIONS[self.map_grid[grid_pos[0]][grid_pos[1]]["level"]]["connection"]:
-                special_pool.append(level)
-
-        self.map_grid[grid_pos[0]][grid_pos[1]]["level"] = random.choice(special_pool)
+        cell = self.cell(grid_pos)
+        special_pool = TYPE_MASK_LEVELS[(type, int(LEVEL_MASKS[self.levels[cell]]))]
+        self.levels[cell] = self.rng.choice(special_pool)
@@ -1,48 +1,409 @@
+import heapq
+import math
 import operator
-from pathfinding.core.grid import Grid
-from pathfinding.core.diagonal_movement import DiagonalMovement
-from pathfinding.finder.a_star import AStarFinder
+import numpy as np
 from pygame import Vector2 as Vector
+from dataclasses import dataclass, field
 from itertools import accumulate, repeat
+from dreamcenter.registry import REGISTRY
 from dreamcenter.constants import (
-    TILE_MAPS,
     TILE_WIDTH,
     TILE_HEIGHT,
 )
 
-finder = AStarFinder(diagonal_movement=DiagonalMovement.if_at_most_one_obstacle)
+SQRT2 = math.sqrt(2)
+CELL_SIZE = TILE_WIDTH / 2
 
 
-def define_grid(level) -> Grid:
+@dataclass
+class NavGrid:
+    """
+    Half tile nav grid combining the static walkable cells of a level with
+    dynamic obstacles stamped by props such as debris.
+
+    Every change to the stamped cells bumps `version` and is logged in `changes`,
+    so incremental planners can repair only what changed since they last looked.
+
+    `clearance` holds the Chebyshev distance in cells from every cell to the nearest
+    blocked cell, so sprites wider than a cell can path through only the cells
+    their footprint fits around.
+    """
+    static: np.ndarray
+    blocked: np.ndarray = None
+    stamps: dict = field(default_factory=dict)
+    changes: list = field(default_factory=list)
+    version: int = 0
+    _walkable: np.ndarray = field(init=False, default=None)
+    _clearance: np.ndarray = field(init=False, default=None)
+    _passable: dict = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        if self.blocked is None:
+            self.blocked = np.zeros(self.static.shape, dtype=np.uint8)
+
+    @property
+    def shape(self):
+        return self.static.shape
+
+    @property
+    def walkable(self) -> np.ndarray:
+        """
+        Boolean array of cells walkable after dynamic obstacles are applied
+        """
+        if self._walkable is None:
+            self._walkable = self.static & (self.blocked == 0)
+        return self._walkable
+
+    @property
+    def clearance(self) -> np.ndarray:
+        """
+        Distance transform of the walkable cells. 0 on blocked cells, 1 on walkable cells
+        next to a blocked cell or the grid border, 2 when the 3x3 block around the cell is
+        walkable and so on.
+        """
+        if self._clearance is None:
+            self._clearance = clearance_map(self.walkable)
+        return self._clearance
+
+    def passable(self, clearance=1) -> np.ndarray:
+        """
+        Boolean array of cells with at least `clearance` cells of clearance
+        """
+        if clearance <= 1:
+            return self.walkable
+        if clearance not in self._passable:
+            self._passable[clearance] = self.clearance >= clearance
+        return self._passable[clearance]
+
+    def rect_cells(self, rect):
+        """
+        Slices of the cells mostly covered by `rect`
+        """
+        inner = rect.inflate(-CELL_SIZE / 2, -CELL_SIZE / 2)
+        height, width = self.static.shape
+        x0 = max(0, int(inner.left // CELL_SIZE))
+        x1 = min(width, int((inner.right - 1) // CELL_SIZE) + 1)
+        y0 = max(0, int(inner.top // CELL_SIZE))
+        y1 = min(height, int((inner.bottom - 1) // CELL_SIZE) + 1)
+        return slice(y0, max(y0, y1)), slice(x0, max(x0, x1))
+
+    def stamp(self, key, rect) -> None:
+        """
+        Marks the cells under `rect` as blocked on behalf of `key`, usually the sprite itself
+        """
+        if key in self.stamps:
+            return
+        cells = self.rect_cells(rect)
+        self.blocked[cells] += 1
+        self.stamps[key] = cells
+        self.record_change(cells)
+
+    def unstamp(self, key) -> None:
+        """
+        Releases the cells stamped by `key`, if any
+        """
+        cells = self.stamps.pop(key, None)
+        if cells is None:
+            return
+        self.blocked[cells] -= 1
+        self.record_change(cells)
+
+    def record_change(self, cells) -> None:
+        self._walkable = None
+        self._clearance = None
+        self._passable.clear()
+        self.version += 1
+        self.changes.append((self.version, cells))
+
+    def changed_since(self, version, margin=0) -> set:
+        """
+        Returns the (x, y) cells changed after `version`, grown by `margin` cells on every
+        side to cover the cells whose clearance up to `margin + 1` may have changed
+        """
+        height, width = self.static.shape
+        changed = set()
+        for change_version, (ys, xs) in reversed(self.changes):
+            if change_version <= version:
+                break
+            changed.update(
+                (x, y)
+                for y in range(max(0, ys.start - margin), min(height, ys.stop + margin))
+                for x in range(max(0, xs.start - margin), min(width, xs.stop + margin))
+            )
+        return changed
+
+
+def walkable_matrix(tile_indices) -> np.ndarray:
     """
     Breaks apart the tiles into 4 quadrants
-    Uses the information stored in TILE_MAPS to build a path grid
+    Uses the information stored in TILE_MAPS to build a boolean path grid indexed [y][x]
+    """
+    return walkable_grid(np.array([[REGISTRY.id(index) for index in row] for row in tile_indices], dtype=np.intp))
+
+
+def walkable_grid(tile_ids) -> np.ndarray:
+    """
+    Boolean path grid of an array of registry tile ids, looked up for all tiles at once
+    from the quadrants compiled into the registry
+    """
+    quadrants = REGISTRY.quadrants[tile_ids]
+    rows, columns = quadrants.shape[:2]
+    # (row, column, quadrant y, quadrant x) -> (row * 2 + quadrant y, column * 2 + quadrant x)
+    return quadrants.transpose(0, 2, 1, 3).reshape(rows * 2, columns * 2)
+
+
+def define_grid(level) -> np.ndarray:
+    """
+    Builds the half tile nav grid of a level's Tilemap
+    """
+    return walkable_grid(level.ids)
+
+
+def clearance_map(walkable) -> np.ndarray:
     """
-    matrix = []
-    _matrix_row = []
-    _matrix_row2 = []
+    Chebyshev distance transform of a boolean nav grid, treating the grid border as blocked.
+    Each pass erodes the walkable cells by one cell in all 8 directions and every cell
+    counts the passes it survives.
+
+    Clearance is counted in half tile cells: a cell with clearance c is the centre of a walkable
+    block of 2c - 1 by 2c - 1 cells, so 1 is a walkable cell, 2 a walkable 3x3 block (75 px) and so on.
+    See `footprint_clearance` for the clearance a sprite needs.
+    """
+    clearance = np.zeros(walkable.shape, dtype=np.uint8)
+    remaining = walkable.copy()
+    while remaining.any():
+        clearance += remaining
+        padded = np.pad(remaining, 1)
+        height, width = remaining.shape
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                remaining &= padded[dy:dy + height, dx:dx + width]
+    return clearance
 
-    for row in level:
-        for tile in row:
-            _matrix_row += TILE_MAPS[tile.index][0]
-            _matrix_row2 += TILE_MAPS[tile.index][1]
-        matrix.append(_matrix_row)
-        matrix.append(_matrix_row2)
-        _matrix_row, _matrix_row2 = [], []
 
-    return Grid(matrix=matrix)
+def footprint_clearance(size) -> int:
+    """
+    Clearance a sprite of `size` (width, height) pixels needs to path through a cell, following
+    the convention of `clearance_map`. A footprint of n cells needs the block of 2c - 1 cells
+    closest to it without being wider, so a 50 px sprite, 2 cells, needs 1 and still fits
+    through a gap one tile wide, while a 75 px sprite needs 2.
+    """
+    cells = math.ceil(max(size) / CELL_SIZE)
+    return max(1, (cells + 1) // 2)
+
+
+def grid_cell(position) -> tuple:
+    """
+    Converts a pixel position into its (x, y) nav grid cell
+    """
+    return int(position[0] // (TILE_HEIGHT / 2)), int(position[1] // (TILE_WIDTH / 2))
 
 
-def find_path(start, end, grid) -> list[tuple]:
+def find_path(start, end, grid, clearance=1) -> list[tuple]:
     """
-    Uses the pathfinder library function to define the shortest path to a point using A* logic
+    Defines the shortest path between two pixel positions as a list of (x, y) grid cells
+    Drop-in replacement for the pathfinding library A* using jump point search.
+    With a `NavGrid` only cells with at least `clearance` cells of clearance are used.
     """
-    _start = grid.node(int(start[0] // (TILE_HEIGHT / 2)), int(start[1] // (TILE_WIDTH / 2)))
-    _end = grid.node(int(end[0] // (TILE_HEIGHT / 2)), int(end[1] // (TILE_WIDTH / 2)))
+    if isinstance(grid, NavGrid):
+        grid = grid.passable(clearance)
+    return jump_point_search(grid, grid_cell(start), grid_cell(end))
+
+
+def octile(dx, dy) -> float:
+    dx, dy = abs(dx), abs(dy)
+    return dx + dy + (SQRT2 - 2) * min(dx, dy)
+
 
-    path, runs = finder.find_path(_start, _end, grid)
-    grid.cleanup()
+def jump_point_search(grid, start, end) -> list[tuple]:
+    """
+    Jump point search over a boolean nav grid from `start` to `end` (x, y) cells.
+    Diagonal steps are allowed as long as at most one of the two adjacent cells is blocked,
+    matching DiagonalMovement.if_at_most_one_obstacle.
+
+    The grid is padded with a blocked border and flattened into bytes, so cells are addressed
+    by a single index and no bounds checks or node objects are needed.
+    Returns every cell along the path including `start`, or an empty list if there is none.
+    """
+    height, width = grid.shape
+    if not (0 <= start[0] < width and 0 <= start[1] < height and 0 <= end[0] < width and 0 <= end[1] < height):
+        return []
+    stride = width + 2
+    cells = np.pad(grid, 1).tobytes()
+    origin = int((start[1] + 1) * stride + start[0] + 1)
+    goal = int((end[1] + 1) * stride + end[0] + 1)
+    goal_x, goal_y = goal % stride, goal // stride
 
+    def jump_straight(index, step, side):
+        """
+        Walks from `index` along `step` until a jump point, the goal or a blocked cell.
+        `side` is the flat offset perpendicular to `step` used to detect forced neighbours.
+        """
+        while cells[index]:
+            if index == goal:
+                return index
+            if (cells[index + step + side] and not cells[index + side]) or \
+                    (cells[index + step - side] and not cells[index - side]):
+                return index
+            index += step
+        return None
+
+    def jump(index, dx, dy):
+        """
+        Jumps from `index` in direction (dx, dy), returning the next jump point or None
+        """
+        if dy == 0:
+            return jump_straight(index, dx, stride)
+        if dx == 0:
+            return jump_straight(index, dy * stride, 1)
+        vertical = dy * stride
+        while cells[index]:
+            if index == goal:
+                return index
+            if (cells[index - dx + vertical] and not cells[index - dx]) or \
+                    (cells[index + dx - vertical] and not cells[index - vertical]):
+                return index
+            if jump_straight(index + dx, dx, stride) is not None or \
+                    jump_straight(index + vertical, vertical, 1) is not None:
+                return index
+            if not (cells[index + dx] or cells[index + vertical]):
+                return None
+            index += dx + vertical
+        return None
+
+    def directions(index, parent):
+        """
+        Pruned set of directions to search from `index` given the direction it was reached from
+        """
+        if parent is None:
+            result = []
+            for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):
+                if cells[index + dx + dy * stride]:
+                    result.append((dx, dy))
+            for dx, dy in ((1, -1), (1, 1), (-1, 1), (-1, -1)):
+                if cells[index + dx + dy * stride] and (cells[index + dx] or cells[index + dy * stride]):
+                    result.append((dx, dy))
+            return result
+        x, y = index % stride, index // stride
+        px, py = parent % stride, parent // stride
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+        vertical = dy * stride
+        result = []
+        if dx and dy:
+            if cells[index + vertical]:
+                result.append((0, dy))
+            if cells[index + dx]:
+                result.append((dx, 0))
+            if cells[index + vertical] or cells[index + dx]:
+                result.append((dx, dy))
+            if not cells[index - dx] and cells[index + vertical]:
+                result.append((-dx, dy))
+            if not cells[index - vertical] and cells[index + dx]:
+                result.append((dx, -dy))
+        elif dx:
+            if cells[index + dx]:
+                result.append((dx, 0))
+                if not cells[index + stride]:
+                    result.append((dx, 1))
+                if not cells[index - stride]:
+                    result.append((dx, -1))
+        else:
+            if cells[index + vertical]:
+                result.append((0, dy))
+                if not cells[index + 1]:
+                    result.append((1, dy))
+                if not cells[index - 1]:
+                    result.append((-1, dy))
+        return result
+
+    g_score = {origin: 0.0}
+    parents = {origin: None}
+    closed = set()
+    open_heap = [(0.0, 0, origin)]
+    counter = 1
+    while open_heap:
+        _, _, index = heapq.heappop(open_heap)
+        if index in closed:
+            continue
+        if index == goal:
+            break
+        closed.add(index)
+        x, y = index % stride, index // stride
+        for dx, dy in directions(index, parents[index]):
+            jump_point = jump(index + dx + dy * stride, dx, dy)
+            if jump_point is None or jump_point in closed:
+                continue
+            jx, jy = jump_point % stride, jump_point // stride
+            score = g_score[index] + octile(jx - x, jy - y)
+            if score < g_score.get(jump_point, math.inf):
+                g_score[jump_point] = score
+                parents[jump_point] = index
+                heapq.heappush(open_heap, (score + octile(goal_x - jx, goal_y - jy), counter, jump_point))
+                counter += 1
+    else:
+        return []
+
+    jump_points = []
+    index = goal
+    while index is not None:
+        jump_points.append((index % stride - 1, index // stride - 1))
+        index = parents[index]
+    jump_points.reverse()
+    return expand_path(jump_points)
+
+
+def distance_field(grid, sources) -> np.ndarray:
+    """
+    Dijkstra flood over a boolean nav grid from every (x, y) cell in `sources` at once,
+    using the same moves as jump point search. Returns the distance in cells from the
+    nearest source for every cell, inf where unreachable.
+    """
+    height, width = grid.shape
+    stride = width + 2
+    cells = np.pad(grid, 1).tobytes()
+    distances = {}
+    open_heap = []
+    for x, y in sources:
+        index = (y + 1) * stride + x + 1
+        distances[index] = 0.0
+        open_heap.append((0.0, index))
+    heapq.heapify(open_heap)
+    moves = [
+        (dx, dy, SQRT2 if dx and dy else 1.0)
+        for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy
+    ]
+    while open_heap:
+        distance, index = heapq.heappop(open_heap)
+        if distance > distances[index]:
+            continue
+        for dx, dy, cost in moves:
+            neighbour = index + dx + dy * stride
+            if not cells[neighbour]:
+                continue
+            if dx and dy and not (cells[index + dx] or cells[index + dy * stride]):
+                continue
+            if distance + cost < distances.get(neighbour, math.inf):
+                distances[neighbour] = distance + cost
+                heapq.heappush(open_heap, (distance + cost, neighbour))
+
+    result = np.full((height, width), np.inf)
+    for index, distance in distances.items():
+        result[index // stride - 1, index % stride - 1] = distance
+    return result
+
+
+def expand_path(jump_points) -> list[tuple]:
+    """
+    Fills in every cell between consecutive jump points
+    """
+    path = jump_points[:1]
+    for x, y in jump_points[1:]:
+        cx, cy = path[-1]
+        while (cx, cy) != (x, y):
+            cx += (x > cx) - (x < cx)
+            cy += (y > cy) - (y < cy)
+            path.append((cx, cy))
     return path
 
 
@@ -0,0 +1,109 @@
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Union
+from dreamcenter.tilemap import Tilemap
+from dreamcenter.constants import LEVEL_CONNECTIONS
+from dreamcenter.map_logic import CARDINALS
+from dreamcenter.path_finding import define_grid
+from dreamcenter.room_states import decode_delta
+from dreamcenter.templates import RoomDelta, room_template
+
+
+@dataclass
+class PreparedRoom:
+    """
+    A room loaded ahead of time: the saved state it was prepared from, as peeked from the room state store,
+    the delta loaded from it, its decoded level data, background Tilemap and static nav grid
+    """
+    position: tuple
+    saved_state: Union[RoomDelta, bytes, None]
+    delta: RoomDelta
+    data: dict
+    tile_map: Tilemap
+    static_grid: np.ndarray
+
+
+def prepare_room(position, level, saved_state=None) -> PreparedRoom:
+    """
+    Loads the room at map `position`, from its saved state if it has been visited before
+    or otherwise from the template of `level`. Spilled saved states are decoded here, on the worker.
+    """
+    if saved_state is None:
+        delta = RoomDelta(room_template(level))
+    elif isinstance(saved_state, bytes):
+        delta = decode_delta(saved_state)
+    else:
+        delta = saved_state
+    data = delta.level_data()
+    tile_map = Tilemap.from_raw(data["background"])
+    return PreparedRoom(
+        position=position,
+        saved_state=saved_state,
+        delta=delta,
+        data=data,
+        tile_map=tile_map,
+        static_grid=define_grid(tile_map),
+    )
+
+
+@dataclass
+class RoomPrefetcher:
+    """
+    Prepares the rooms connected to the current room on a background thread,
+    so walking through a door does not have to build the next room's tile map and nav grid first.
+    """
+    executor: ThreadPoolExecutor = field(
+        default_factory=lambda: ThreadPoolExecutor(max_workers=1, thread_name_prefix="room_prefetch")
+    )
+    pending: Dict[tuple, Future] = field(default_factory=dict)
+
+    def prefetch(self, map_manager, position, skip=()) -> None:
+        """
+        Queues every room connected to the room at map `position`, except the rooms in `skip`,
+        and drops the rooms queued for anywhere else
+        """
+        wanted = set()
+        connection = LEVEL_CONNECTIONS[map_manager.level_at(position)]["connection"]
+        for (dy, dx), connected in zip(CARDINALS, connection):
+            neighbour = (position[0] + dy, position[1] + dx)
+            if not connected or map_manager.level_at(neighbour) == "blank" or neighbour in skip:
+                continue
+            wanted.add(neighbour)
+            if neighbour not in self.pending:
+                self.pending[neighbour] = self.executor.submit(
+                    prepare_room, neighbour, map_manager.level_at(neighbour), map_manager.saved_states.peek(neighbour)
+                )
+        for position in set(self.pending) - wanted:
+            self.pending.pop(position).cancel()
+
+    def take(self, position, saved_state=None) -> Optional[PreparedRoom]:
+        """
+        Returns the prepared room at map `position` if it is ready and was prepared from
+        `saved_state`, as peeked from the room state store, otherwise None and the room should be loaded directly
+        """
+        future = self.pending.pop(position, None)
+        if future is None or not future.done():
+            if future is not None:
+                future.cancel()
+            return None
+        if future.cancelled() or future.exception() is not None:
+            return None
+        room = future.result()
+        if room.saved_state is not saved_state:
+            # Spilled states are read back as new payloads each time, those match by content
+            if not (isinstance(saved_state, bytes) and room.saved_state == saved_state):
+                return None
+        return room
+
+    def clear(self) -> None:
+        """
+        Drops every queued room, used when a new map replaces the current one
+        """
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def shutdown(self) -> None:
+        self.clear()
+        self.executor.shutdown(wait=True)
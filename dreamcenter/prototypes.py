@@ -0,0 +1,43 @@
+import pygame as pg
+from dataclasses import dataclass
+from functools import lru_cache
+from dreamcenter.registry import REGISTRY, IS_BG
+from dreamcenter.constants import IMAGE_SPRITES
+
+
+@dataclass(frozen=True)
+class SpritePrototype:
+    """
+    Immutable data shared by every sprite showing image `index`: which collision mask image it
+    uses and the masks derived from it. Masks are built once per size and rotation and then
+    referenced by every sprite of the index instead of being rebuilt for each sprite.
+    Background tiles rotate their mask with the tile, every other sprite keeps an upright mask.
+    """
+    index: str
+    mask_name: str
+
+    @property
+    def rotates_mask(self) -> bool:
+        return self.mask_name == "bg_mask"
+
+    def image(self, flipped_x=False, flipped_y=False) -> pg.Surface:
+        return IMAGE_SPRITES[(flipped_x, flipped_y, self.index)]
+
+    def mask(self, size, angle=0) -> pg.mask.Mask:
+        """
+        Shared collision mask for an image of `size` rotated by `angle`. Treat it as read only.
+        """
+        return scaled_mask(self.mask_name, tuple(size), angle if self.rotates_mask else 0)
+
+
+@lru_cache(maxsize=None)
+def sprite_prototype(index) -> SpritePrototype:
+    return SpritePrototype(index=index, mask_name="bg_mask" if REGISTRY.flags_of(index) & IS_BG else "collision_mask")
+
+
+@lru_cache(maxsize=None)
+def scaled_mask(mask_name, size, angle=0) -> pg.mask.Mask:
+    mask_image = pg.transform.scale(IMAGE_SPRITES[(False, False, mask_name)], size)
+    if angle:
+        mask_image = pg.transform.rotate(mask_image, angle)
+    return pg.mask.from_surface(mask_image)
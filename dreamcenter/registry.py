@@ -0,0 +1,115 @@
+import threading
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from dreamcenter.constants import (
+    SPRITES,
+    ANIMATIONS,
+    ALLOWED_BG,
+    ALLOWED_ENEMY,
+    ALLOWED_SHRUB,
+    ALLOWED_BUFFS,
+    WALLS,
+    DOORS,
+    DEBRIS,
+    BLOCKING_SHRUBS,
+    TILE_MAPS,
+    ENEMY_STATS,
+    ITEM_STATS,
+)
+
+# Flag bits of a sprite index
+IS_BG = 1 << 0
+IS_WALL = 1 << 1
+IS_DOOR = 1 << 2
+# The index itself is a debris type that can be destroyed
+IS_DEBRIS = 1 << 3
+IS_SHRUB = 1 << 4
+IS_BUFF = 1 << 5
+IS_BLOCKING = 1 << 6
+# The base type, the index up to the first "_", is debris, an enemy or an item,
+# so animation frames such as "chair_001" or "spider_death_002" share the flags of their type
+DEBRIS_TYPE = 1 << 7
+ENEMY_TYPE = 1 << 8
+ITEM_TYPE = 1 << 9
+
+# Walkable quadrants of indices that are not background tiles
+NO_QUADRANTS = ((False, False), (False, False))
+
+
+def index_flags(name) -> int:
+    if name is None:
+        return 0
+    base = name.split("_")[0]
+    return (
+        IS_BG * (name in ALLOWED_BG)
+        | IS_WALL * (name in WALLS)
+        | IS_DOOR * (name in DOORS)
+        | IS_DEBRIS * (name in DEBRIS)
+        | IS_SHRUB * (name in ALLOWED_SHRUB)
+        | IS_BUFF * (name in ALLOWED_BUFFS)
+        | IS_BLOCKING * (name in BLOCKING_SHRUBS)
+        | DEBRIS_TYPE * (base in DEBRIS)
+        | ENEMY_TYPE * (base in ALLOWED_ENEMY)
+        | ITEM_TYPE * (base.lower() in ITEM_STATS)
+    )
+
+
+@dataclass
+class Registry:
+    """
+    Integer ids of every sprite index with precomputed flag bits, base type and walkable tile quadrants,
+    so hot paths test bits and index arrays instead of searching the lists in constants.
+    Compiled from constants at import, indices first seen later, such as those in level files,
+    are registered on first use. Id 0 is the missing index None.
+    """
+    names: List[Optional[str]] = field(default_factory=list)
+    ids: Dict[Optional[str], int] = field(default_factory=dict)
+    flags: List[int] = field(default_factory=list)
+    # `flags` as an array, for looking up the flags of whole arrays of ids
+    flag_array: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    base: List[Optional[str]] = field(default_factory=list)
+    quadrants: np.ndarray = field(default_factory=lambda: np.zeros((0, 2, 2), dtype=bool))
+    # Rooms are also prepared on the prefetch thread
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def compile(cls) -> "Registry":
+        registry = cls()
+        names = [None, *SPRITES, *TILE_MAPS, *ALLOWED_BUFFS, *DEBRIS, *ENEMY_STATS, *ITEM_STATS]
+        names.extend(frame for frames in ANIMATIONS.values() for frame in frames)
+        names.extend(debris["replacement"] for debris in DEBRIS.values())
+        for name in names:
+            registry.id(name)
+        return registry
+
+    def id(self, name) -> int:
+        """
+        Id of sprite index `name`, registering it if it is new
+        """
+        index_id = self.ids.get(name)
+        if index_id is None:
+            index_id = self.register(name)
+        return index_id
+
+    def flags_of(self, name) -> int:
+        return self.flags[self.id(name)]
+
+    def register(self, name) -> int:
+        with self.lock:
+            if name in self.ids:
+                return self.ids[name]
+            index_id = len(self.names)
+            self.names.append(name)
+            self.flags.append(index_flags(name))
+            self.flag_array = np.append(self.flag_array, self.flags[-1])
+            self.base.append(None if name is None else name.split("_")[0])
+            self.quadrants = np.concatenate(
+                (self.quadrants, np.array([TILE_MAPS.get(name, NO_QUADRANTS)], dtype=bool))
+            )
+            # Published last, so readers only see ids whose arrays are filled in
+            self.ids[name] = index_id
+            return index_id
+
+
+REGISTRY = Registry.compile()
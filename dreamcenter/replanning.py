@@ -0,0 +1,265 @@
+import heapq
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from dreamcenter.path_finding import NavGrid, octile, expand_path, SQRT2
+
+# Move costs in integer units. Keys of cells on equally short routes then compare exactly equal,
+# with float costs they can differ in their last bits and stop the search before those cells are expanded.
+STRAIGHT_COST = 1_000_000
+DIAGONAL_COST = round(SQRT2 * STRAIGHT_COST)
+
+NEIGHBOURS = (
+    (0, -1, STRAIGHT_COST), (1, 0, STRAIGHT_COST), (0, 1, STRAIGHT_COST), (-1, 0, STRAIGHT_COST),
+    (1, -1, DIAGONAL_COST), (1, 1, DIAGONAL_COST), (-1, 1, DIAGONAL_COST), (-1, -1, DIAGONAL_COST),
+)
+
+# Number of cells the player may drift from the planned goal before the search is re-seeded
+GOAL_TOLERANCE = 4
+
+
+@dataclass
+class DStarLite:
+    """
+    Incremental planner (D* Lite) over a `NavGrid` for a single chasing enemy.
+
+    The search runs backwards from the goal, so the enemy walking along its path only
+    shifts the priority keys, and obstacles stamped into or removed from the nav grid
+    are repaired locally around the changed cells instead of searching from scratch.
+    A player moving within GOAL_TOLERANCE cells of the planned goal keeps the current
+    search, anything further re-seeds it.
+
+    Cells are addressed by flat indices into a copy of the walkable grid padded with a
+    blocked border, the same layout used by jump point search. Only cells with at least
+    `clearance` cells of clearance are walkable for the planner, so enemies wider than
+    a cell are not routed through gaps they would get stuck in.
+    """
+    nav_grid: NavGrid
+    clearance: int = 1
+    goal_tolerance: int = GOAL_TOLERANCE
+    start: int = None
+    goal: int = None
+    last: int = None
+    km: int = 0
+    version: int = 0
+    cells: bytearray = field(init=False, default=None)
+    stride: int = field(init=False, default=0)
+    g: dict = field(init=False, default_factory=dict)
+    rhs: dict = field(init=False, default_factory=dict)
+    queue: list = field(init=False, default_factory=list)
+    queued: dict = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        self.stride = self.nav_grid.shape[1] + 2
+        self.sync_cells()
+
+    def sync_cells(self):
+        self.cells = bytearray(np.pad(self.nav_grid.passable(self.clearance), 1).tobytes())
+        self.version = self.nav_grid.version
+
+    def index(self, cell) -> int:
+        return (cell[1] + 1) * self.stride + cell[0] + 1
+
+    def cell(self, index) -> tuple:
+        return index % self.stride - 1, index // self.stride - 1
+
+    def inside(self, cell) -> bool:
+        height, width = self.nav_grid.shape
+        return 0 <= cell[0] < width and 0 <= cell[1] < height
+
+    def heuristic(self, a, b) -> int:
+        """
+        Octile distance between two cells in integer move cost units
+        """
+        dx = abs(a % self.stride - b % self.stride)
+        dy = abs(a // self.stride - b // self.stride)
+        return STRAIGHT_COST * (dx + dy) + (DIAGONAL_COST - 2 * STRAIGHT_COST) * min(dx, dy)
+
+    def key(self, index) -> tuple:
+        value = min(self.g.get(index, math.inf), self.rhs.get(index, math.inf))
+        return value + self.heuristic(self.start, index) + self.km, value
+
+    def edges(self, index):
+        """
+        Yields (neighbour, cost) for every move out of `index`.
+        Moving into a blocked cell is not allowed, except into the goal so a player
+        standing against a wall or prop can still be reached. Diagonal moves need at
+        least one of the two adjacent cells to be walkable.
+        """
+        cells = self.cells
+        stride = self.stride
+        for dx, dy, cost in NEIGHBOURS:
+            neighbour = index + dx + dy * stride
+            if not (cells[neighbour] or neighbour == self.goal):
+                continue
+            if dx and dy and not (cells[index + dx] or cells[index + dy * stride]):
+                continue
+            yield neighbour, cost
+
+    def reset(self, start, goal) -> None:
+        self.start = self.last = start
+        self.goal = goal
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = []
+        self.queued = {}
+        self.push(goal)
+
+    def push(self, index) -> None:
+        key = self.key(index)
+        self.queued[index] = key
+        heapq.heappush(self.queue, (key, index))
+
+    def top(self):
+        """
+        Returns the smallest valid queue entry, discarding stale ones
+        """
+        while self.queue:
+            key, index = self.queue[0]
+            if self.queued.get(index) == key:
+                return key, index
+            heapq.heappop(self.queue)
+        return (math.inf, math.inf), None
+
+    def update_vertex(self, index) -> None:
+        if index != self.goal:
+            self.rhs[index] = min(
+                (cost + self.g.get(neighbour, math.inf) for neighbour, cost in self.edges(index)),
+                default=math.inf,
+            )
+        self.queued.pop(index, None)
+        if self.g.get(index, math.inf) != self.rhs.get(index, math.inf):
+            self.push(index)
+
+    def update_around(self, index) -> None:
+        """
+        Updates `index` and the neighbours whose moves could pass through or around it
+        """
+        for dx, dy, _ in NEIGHBOURS:
+            neighbour = index + dx + dy * self.stride
+            if self.cells[neighbour] or neighbour == self.start:
+                self.update_vertex(neighbour)
+        self.update_vertex(index)
+
+    def compute_shortest_path(self) -> None:
+        g, rhs = self.g, self.rhs
+        while True:
+            top_key, index = self.top()
+            start_key = self.key(self.start)
+            if index is None or (top_key >= start_key and
+                                 rhs.get(self.start, math.inf) <= g.get(self.start, math.inf)):
+                return
+            heapq.heappop(self.queue)
+            del self.queued[index]
+            new_key = self.key(index)
+            if top_key < new_key:
+                self.push(index)
+            elif g.get(index, math.inf) > rhs.get(index, math.inf):
+                g[index] = rhs[index]
+                self.propagate(index)
+            else:
+                g[index] = math.inf
+                self.propagate(index)
+                self.update_vertex(index)
+
+    def propagate(self, index) -> None:
+        """
+        Updates the predecessors of `index` after its g value changed
+        """
+        for dx, dy, _ in NEIGHBOURS:
+            neighbour = index + dx + dy * self.stride
+            if self.cells[neighbour] or neighbour == self.start:
+                self.update_vertex(neighbour)
+
+    def apply_changes(self) -> None:
+        """
+        Pulls the cells changed in the nav grid since the last plan and repairs around them
+        """
+        if self.nav_grid.version == self.version:
+            return
+        passable = self.nav_grid.passable(self.clearance)
+        for x, y in self.nav_grid.changed_since(self.version, self.clearance - 1):
+            index = self.index((x, y))
+            value = int(passable[y, x])
+            if self.cells[index] != value:
+                self.cells[index] = value
+                if self.goal is not None:
+                    self.update_around(index)
+        self.version = self.nav_grid.version
+
+    def plan(self, start_cell, goal_cell) -> list[tuple]:
+        """
+        Returns the path of (x, y) cells from `start_cell` to `goal_cell`, reusing and repairing
+        the previous search where possible. Returns an empty list if the goal cannot be reached.
+        """
+        if not (self.inside(start_cell) and self.inside(goal_cell)):
+            return []
+        self.apply_changes()
+        origin = start_cell
+        start_cell = self.nearest_passable(start_cell)
+        start = self.index(start_cell)
+        if self.goal is None or self.drift(goal_cell) > self.goal_tolerance:
+            self.reset(start, self.index(goal_cell))
+        else:
+            self.km += self.heuristic(self.last, start)
+            self.start = self.last = start
+            if not self.cells[start]:
+                self.update_vertex(start)
+        self.compute_shortest_path()
+        path = self.extract_path()
+        if path and origin != start_cell:
+            # Walk out of the narrow spot onto the planned path first
+            path = expand_path([origin] + path)
+        return path
+
+    def nearest_passable(self, cell) -> tuple:
+        """
+        Returns the closest cell to `cell` within `clearance - 1` cells that the planner may walk on,
+        or `cell` itself if it is passable or nothing nearby is. A wide enemy pushed against a wall
+        stands on cells without enough clearance and has to step away from the wall first.
+        """
+        if self.cells[self.index(cell)]:
+            return cell
+        reach = self.clearance - 1
+        nearby = [
+            (cell[0] + dx, cell[1] + dy)
+            for dy in range(-reach, reach + 1)
+            for dx in range(-reach, reach + 1)
+        ]
+        nearby = [other for other in nearby if self.inside(other) and self.cells[self.index(other)]]
+        if not nearby:
+            return cell
+        return min(nearby, key=lambda other: octile(other[0] - cell[0], other[1] - cell[1]))
+
+    def drift(self, goal_cell) -> int:
+        """
+        Chebyshev distance in cells between `goal_cell` and the planned goal
+        """
+        x, y = self.cell(self.goal)
+        return max(abs(goal_cell[0] - x), abs(goal_cell[1] - y))
+
+    def distance(self, index):
+        """
+        Best known cost from `index` to the goal. Cells whose key ties with the start's may
+        still be queued when the search stops, with only their rhs value up to date.
+        """
+        return min(self.g.get(index, math.inf), self.rhs.get(index, math.inf))
+
+    def extract_path(self) -> list[tuple]:
+        if self.rhs.get(self.start, math.inf) == math.inf:
+            return []
+        path = [self.cell(self.start)]
+        index = self.start
+        for _ in range(len(self.cells)):
+            if index == self.goal:
+                return path
+            index, cost = min(
+                self.edges(index),
+                key=lambda edge: edge[1] + self.distance(edge[0]),
+                default=(None, math.inf),
+            )
+            if index is None or self.distance(index) == math.inf:
+                return []
+            path.append(self.cell(index))
+        return []
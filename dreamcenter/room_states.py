@@ -0,0 +1,129 @@
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+from dreamcenter.constants import ROOM_STATES_IN_MEMORY, SPILL_COMPACT_BYTES
+from dreamcenter.templates import RoomDelta, room_template
+
+
+def decode_delta(payload) -> RoomDelta:
+    """
+    Decodes a room delta spilled in the binary room delta format against its packaged level template
+    """
+    return RoomDelta.from_bytes(payload, room_template(RoomDelta.template_name(payload)))
+
+
+@dataclass
+class RoomStateStore:
+    """
+    Saved states of visited rooms, keyed by map (row, column) position.
+
+    The `capacity` most recently stored or loaded room states are kept in memory. Older ones are
+    spilled to an anonymous temporary file in the binary room delta format and decoded again
+    against their packaged level template when the room is next loaded, so memory use does not
+    grow with the number of rooms visited. A room spilled again is appended to the file and its
+    previous record is left unused, the file is rewritten with only the live records once
+    `dead_bytes` of unused records pass `compact_bytes` and outweigh the live ones.
+    """
+    capacity: int = ROOM_STATES_IN_MEMORY
+    compact_bytes: int = SPILL_COMPACT_BYTES
+    recent: OrderedDict = field(default_factory=OrderedDict)
+    spilled: Dict[tuple, Tuple[int, int]] = field(default_factory=dict)
+    spill_file: Optional[BinaryIO] = field(default=None, repr=False)
+    dead_bytes: int = 0
+
+    def __setitem__(self, position, delta) -> None:
+        self.discard(position)
+        self.recent[position] = delta
+        self.recent.move_to_end(position)
+        while len(self.recent) > self.capacity:
+            self.spill(*self.recent.popitem(last=False))
+
+    def __getitem__(self, position) -> RoomDelta:
+        delta = self.get(position)
+        if delta is None:
+            raise KeyError(position)
+        return delta
+
+    def __contains__(self, position) -> bool:
+        return position in self.recent or position in self.spilled
+
+    def __len__(self) -> int:
+        return len(self.recent) + len(self.spilled)
+
+    def get(self, position, default=None) -> Optional[RoomDelta]:
+        """
+        Saved state of the room at map `position`, reloaded from disk if it was spilled
+        """
+        if position in self.recent:
+            self.recent.move_to_end(position)
+            return self.recent[position]
+        if position not in self.spilled:
+            return default
+        delta = self.load(position)
+        self[position] = delta
+        return delta
+
+    def peek(self, position) -> Union[RoomDelta, bytes, None]:
+        """
+        Saved state of the room at map `position` without promoting or decoding it:
+        the delta if it is in memory, its encoded payload if it was spilled, otherwise None.
+        Used to prepare rooms ahead of time without disturbing which rooms stay in memory.
+        """
+        if position in self.recent:
+            return self.recent[position]
+        if position in self.spilled:
+            return self.payload(position)
+        return None
+
+    def spill(self, position, delta) -> None:
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(prefix="dreamcenter_rooms_")
+        payload = delta.to_bytes()
+        offset = self.spill_file.seek(0, 2)
+        self.spill_file.write(payload)
+        self.spilled[position] = (offset, len(payload))
+
+    def payload(self, position) -> bytes:
+        offset, length = self.spilled[position]
+        self.spill_file.seek(offset)
+        return self.spill_file.read(length)
+
+    def load(self, position) -> RoomDelta:
+        return decode_delta(self.payload(position))
+
+    def discard(self, position) -> None:
+        """
+        Marks the spilled record of the room at map `position`, if any, as unused
+        """
+        record = self.spilled.pop(position, None)
+        if record is None:
+            return
+        self.dead_bytes += record[1]
+        live_bytes = sum(length for _, length in self.spilled.values())
+        if self.dead_bytes > max(self.compact_bytes, live_bytes):
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Rewrites the spill file with only the live records
+        """
+        spill_file = tempfile.TemporaryFile(prefix="dreamcenter_rooms_")
+        for position in list(self.spilled):
+            payload = self.payload(position)
+            self.spilled[position] = (spill_file.tell(), len(payload))
+            spill_file.write(payload)
+        self.spill_file.close()
+        self.spill_file = spill_file
+        self.dead_bytes = 0
+
+    def close(self) -> None:
+        """
+        Drops every saved state and deletes the spill file
+        """
+        self.recent.clear()
+        self.spilled.clear()
+        self.dead_bytes = 0
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
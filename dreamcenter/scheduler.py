@@ -0,0 +1,186 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from math import ceil
+from typing import Callable, Deque, Dict, Generator, Optional
+from dreamcenter.constants import SCHEDULER_BUDGET_MS
+
+
+@dataclass
+class TaskStats:
+    """
+    Timing statistics collected for every task registered under the same name
+    """
+    steps: int = 0
+    passes: int = 0
+    total_ms: float = 0.0
+    max_step_ms: float = 0.0
+    last_pass_steps: int = 0
+
+    @property
+    def mean_step_ms(self) -> float:
+        return self.total_ms / self.steps if self.steps else 0.0
+
+
+@dataclass
+class Task:
+    """
+    A unit of cooperative work. The generator yields after every small piece of work
+    so the scheduler can stop it once the frame budget is spent.
+
+    Recurring tasks hold a `factory` that creates a fresh generator for every pass and
+    spread each pass over `interval` frames. One-shot tasks only hold a `generator`.
+    """
+    name: str
+    factory: Optional[Callable[[], Generator]] = None
+    generator: Optional[Generator] = None
+    interval: int = 1
+    pass_started: Optional[int] = None
+    pass_steps: int = 0
+
+    @property
+    def recurring(self) -> bool:
+        return self.factory is not None
+
+
+@dataclass
+class TaskScheduler:
+    """
+    Runs generator based tasks round robin under a per frame millisecond budget
+    """
+    budget_ms: float = SCHEDULER_BUDGET_MS
+    frame: int = 0
+    tasks: Deque[Task] = field(default_factory=deque)
+    stats: Dict[str, TaskStats] = field(default_factory=dict)
+
+    def add_recurring(self, name, factory, interval=1) -> Task:
+        """
+        Registers a task whose generator is recreated by `factory` every `interval` frames
+        """
+        task = Task(name=name, factory=factory, interval=max(1, interval))
+        self.tasks.append(task)
+        self.stats.setdefault(name, TaskStats())
+        return task
+
+    def add_once(self, name, generator) -> Task:
+        """
+        Registers a generator that is run to completion as budget allows and then dropped
+        """
+        task = Task(name=name, generator=generator)
+        self.tasks.append(task)
+        self.stats.setdefault(name, TaskStats())
+        return task
+
+    def remove(self, name) -> None:
+        """
+        Removes every task registered under `name`
+        """
+        self.tasks = deque(task for task in self.tasks if task.name != name)
+
+    def restart(self) -> None:
+        """
+        Drops all one-shot tasks and any recurring pass in progress.
+        Used when the world the tasks were working on is replaced, such as on level change.
+        """
+        self.tasks = deque(task for task in self.tasks if task.recurring)
+        for task in self.tasks:
+            task.generator = None
+            task.pass_started = None
+            task.pass_steps = 0
+
+    def quota(self, task) -> Optional[int]:
+        """
+        Number of steps a recurring task may take this frame so a full pass is spread
+        evenly over its interval. Unlimited until the length of a pass is known.
+        """
+        if not task.recurring:
+            return None
+        last_pass_steps = self.stats[task.name].last_pass_steps
+        if not last_pass_steps:
+            return None
+        return ceil(last_pass_steps / task.interval)
+
+    def begin_pass(self, task) -> bool:
+        """
+        Starts a new pass of a recurring task if its interval has elapsed
+        """
+        if task.pass_started is not None and self.frame - task.pass_started < task.interval:
+            return False
+        task.generator = task.factory()
+        task.pass_started = self.frame
+        task.pass_steps = 0
+        return True
+
+    def finish_pass(self, task) -> None:
+        stats = self.stats[task.name]
+        stats.passes += 1
+        if task.recurring:
+            stats.last_pass_steps = task.pass_steps
+        task.generator = None
+
+    def step(self, task) -> bool:
+        """
+        Advances `task` by one step, recording its timing.
+        Returns False once the task's generator is exhausted.
+        """
+        stats = self.stats[task.name]
+        started = time.perf_counter()
+        try:
+            next(task.generator)
+            running = True
+        except StopIteration:
+            running = False
+        elapsed = (time.perf_counter() - started) * 1000
+        stats.total_ms += elapsed
+        stats.max_step_ms = max(stats.max_step_ms, elapsed)
+        if running:
+            stats.steps += 1
+            task.pass_steps += 1
+        return running
+
+    def run(self) -> None:
+        """
+        Runs tasks until the frame budget is spent. Tasks not reached this frame
+        are first in line on the next one. At least one step is always taken so
+        no task can starve under a very small budget.
+        """
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        worked = False
+        for _ in range(len(self.tasks)):
+            if worked and time.perf_counter() >= deadline:
+                break
+            task = self.tasks.popleft()
+            keep = True
+            if task.generator is None and task.recurring:
+                self.begin_pass(task)
+            if task.generator is not None:
+                quota = self.quota(task)
+                taken = 0
+                while quota is None or taken < quota:
+                    worked = True
+                    if not self.step(task):
+                        self.finish_pass(task)
+                        keep = task.recurring
+                        break
+                    taken += 1
+                    if time.perf_counter() >= deadline:
+                        break
+            if keep:
+                self.tasks.append(task)
+        self.frame += 1
+
+    def report(self) -> dict:
+        """
+        Returns the per task statistics as plain values, useful for debugging overlays or logging
+        """
+        return {
+            name: {
+                "steps": stats.steps,
+                "passes": stats.passes,
+                "total_ms": round(stats.total_ms, 3),
+                "mean_step_ms": round(stats.mean_step_ms, 4),
+                "max_step_ms": round(stats.max_step_ms, 3),
+                "last_pass_steps": stats.last_pass_steps,
+            }
+            for name, stats in self.stats.items()
+        }
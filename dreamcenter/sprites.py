@@ -2,11 +2,18 @@ import math
 import pygame as pg
 import operator
 import random
+import weakref
 from pygame import Vector2 as Vector
 from dataclasses import dataclass, field
+from collections import deque
 from typing import Generator, Optional, Dict
 from itertools import cycle, repeat, count, accumulate
-from dreamcenter.helpers import extend, angle_to, random_normalized_vector
+from dreamcenter.helpers import angle_to, random_normalized_vector
+from dreamcenter.path_finding import footprint_clearance
+from dreamcenter.entities import ENTITIES, NEVER, Column, movement_column, ai_level_column
+from dreamcenter.animation import CLOCK, animation_clips
+from dreamcenter.prototypes import sprite_prototype
+from dreamcenter.registry import REGISTRY, IS_BG, DEBRIS_TYPE, ENEMY_TYPE
 from dreamcenter.constants import (
     IMAGE_SPRITES,
     TILE_HEIGHT,
@@ -22,17 +29,25 @@ from dreamcenter.constants import (
     ITEM_STATS,
     ALLOWED_SHRUB,
     DEBRIS,
+    AI_LOD,
+    SPRITE_POOL_CAP,
+    POSITION_HISTORY,
 )
 from dreamcenter.enumeration import (
     AnimationState,
     SpriteState,
     MovementType,
     Layer,
+    AILevel,
 )
 
 
 class Sprite(pg.sprite.Sprite):
     _layer = Layer.background
+    # Pool the sprite returns to when killed, set while a pooled sprite is in use
+    pool = None
+    # Sprites that are not dynamic sleep, skipped by ActiveLayeredUpdates.update, unless animating or moving
+    dynamic = True
 
     @classmethod
     def create_from_surface(
@@ -60,11 +75,15 @@ class Sprite(pg.sprite.Sprite):
         orientation=0,
         flipped_x=False,
         flipped_y=False,
+        pool=None,
         **kwargs,
     ):
+        """
+        Creates a sprite showing image `index`, taking a recycled instance from `pool` if one is given
+        """
         image = image_tiles[(flipped_x, flipped_y, index)]
         rect = image.get_rect()
-        return cls(
+        return (cls if pool is None else pool.acquire)(
             image=image,
             image_tiles=image_tiles,
             index=index,
@@ -90,7 +109,10 @@ class Sprite(pg.sprite.Sprite):
         flipped_y=False,
         frames=None,
         animation_state=AnimationState.stopped,
+        spawn_id=None,
     ):
+        # Read by the groups the sprite is added to
+        self.awake = self.dynamic
         super().__init__(groups)
         self.image = image
         self.channel = channel
@@ -106,36 +128,45 @@ class Sprite(pg.sprite.Sprite):
         self.angle = self.generate_rotation()
         self._last_angle = None
         self.final_position = position
+        # Recycled sprites restart their animation even when given the state they ended in
+        self._animation_state = None
         self.animation_state = animation_state
+        # (kind, record number) of the room template record the sprite was loaded from, if any
+        self.spawn_id = spawn_id
+        # Shared image independent data of the index, masks come from the prototype instead of each sprite
+        self.prototype = sprite_prototype(self.index)
         if self.image is not None:
-            if self.index in ALLOWED_BG:
-                self.mask = pg.mask.from_surface(
-                    pg.transform.scale(IMAGE_SPRITES[(False, False, "bg_mask")], self.image.get_size()))
-            else:
-                self.mask = pg.mask.from_surface(
-                    pg.transform.scale(IMAGE_SPRITES[(False, False, "collision_mask")], self.image.get_size()))
-            self.surface = self.image.copy()
+            self.mask = self.prototype.mask(self.image.get_size())
+            self.surface = self.image
             self.rotate(self.orientation)
         if self.rect is not None and position is not None:
-            if self.index in ALLOWED_BG:
+            if self.flags & IS_BG:
                 self.move(position, center=False)
             else:
                 self.move(position)
 
     def set_sprite_index(self, index):
         self.image = self.image_tiles[(self.flipped_x, self.flipped_y, index)]
-        self.surface = self.image.copy()
+        self.surface = self.image
         self.rect = self.image.get_rect(center=self.rect.center)
-        if self.index in ALLOWED_BG:
-            self.mask = pg.mask.from_surface(
-                    pg.transform.scale(IMAGE_SPRITES[(False, False, "bg_mask")], self.image.get_size()))
-        else:
-            self.mask = pg.mask.from_surface(
-                pg.transform.scale(IMAGE_SPRITES[(False, False, "collision_mask")], self.image.get_size())
-            )
+        self.prototype = sprite_prototype(index)
+        self.mask = self.prototype.mask(self.image.get_size())
         self.index = index
         self.rotate(self.orientation)
 
+    @property
+    def index(self):
+        return self._index
+
+    @index.setter
+    def index(self, index):
+        """
+        Keeps the registry id and flag bits of the index next to it, so checks on the index are bit tests
+        """
+        self._index = index
+        self.index_id = REGISTRY.id(index)
+        self.flags = REGISTRY.flags[self.index_id]
+
     def move(self, position, center: bool = True):
         if center:
             self.rect.center = position
@@ -167,14 +198,7 @@ class Sprite(pg.sprite.Sprite):
             new_rect = new_image.get_rect(center=self.rect.center)
         self.image = new_image
         self.rect = new_rect
-        if self.index in ALLOWED_BG:
-            self.mask = pg.mask.from_surface(
-                    pg.transform.rotate(
-                    pg.transform.scale(IMAGE_SPRITES[(False, False, "bg_mask")], self.image.get_size()), angle))
-        else:
-            self.mask = pg.mask.from_surface(
-                pg.transform.scale(IMAGE_SPRITES[(False, False, "collision_mask")], self.image.get_size())
-            )
+        self.mask = self.prototype.mask(self.image.get_size(), angle)
         self._last_angle = angle
 
     def generate_rotation(self):
@@ -188,36 +212,55 @@ class Sprite(pg.sprite.Sprite):
         self.angle = self.generate_rotation()
         self.rotate(next(self.angle))
 
+    @property
+    def animation_state(self):
+        return self._animation_state
+
+    @animation_state.setter
+    def animation_state(self, state):
+        """
+        Changing state restarts the animation at the current animation tick, with its first frame due
+        """
+        if state != getattr(self, "_animation_state", None):
+            self._animation_state = state
+            self.animation_start = CLOCK.tick
+            self.next_frame_tick = CLOCK.tick
+            if state != AnimationState.stopped:
+                self.wake()
+
     def animate(self):
+        """
+        Shows the frame of the current state's clip at the current animation tick.
+        `frames` is the shared clip table of the sprite's type, made with `animation_clips`.
+        Keeps the tick of the next frame change in `next_frame_tick` for the entity store's animation system.
+        """
         if self.frames is None:
+            self.next_frame_tick = NEVER
             return
-        roll = self.frames.get(self.animation_state, None)
-        if roll is None:
+        clip = self.frames.get(self.animation_state, None)
+        if clip is None:
+            self.next_frame_tick = NEVER
             return
-        try:
-            next_frame_index = next(roll)
+        elapsed = CLOCK.tick - self.animation_start
+        self.next_frame_tick = self.animation_start + clip.next_change(elapsed)
+        next_frame_index = clip.frame(elapsed)
+        if next_frame_index is not None:
             if next_frame_index != self.index:
                 self.set_sprite_index(next_frame_index)
-        except StopIteration:
+        else:
             if AnimationState.state_kills_sprite(self.animation_state):
-                index = self.index.split("_")[0]
-                if index in DEBRIS:
-                    self.index = DEBRIS[index]["replacement"]
+                if self.flags & DEBRIS_TYPE:
+                    self.index = DEBRIS[REGISTRY.base[self.index_id]]["replacement"]
                     self.animation_state = AnimationState.stopped
-                elif index in ALLOWED_ENEMY:
+                elif self.flags & ENEMY_TYPE:
                     self.frames = None
                     self.animation_state = AnimationState.stopped
+                    # Corpses stay where they fell
+                    self.sleep()
                 else:
                     self.kill()
             if AnimationState.state_ends(self.animation_state):
                 self.animation_state = AnimationState.stopped
-                self.frames = create_animation_roll(
-                    {
-                        AnimationState.firing: extend(
-                            self.original_frames, self.original_frames_speed
-                        ),
-                    }
-                )
 
     def play(self):
         if self.sounds is not None and pg.mixer and self.channel is not None:
@@ -232,12 +275,90 @@ class Sprite(pg.sprite.Sprite):
         angle = next(self.angle)
         self.rotate(angle)
         self.animate()
+        self.settle()
+
+    def wake(self):
+        """
+        Puts the sprite back into the updated sprites of its groups
+        """
+        if not self.awake:
+            self.awake = True
+            for group in self.groups():
+                if isinstance(group, ActiveLayeredUpdates):
+                    group.wake(self)
+
+    def sleep(self):
+        if self.awake:
+            self.awake = False
+            for group in self.groups():
+                if isinstance(group, ActiveLayeredUpdates):
+                    group.sleep(self)
+
+    def settle(self):
+        """
+        Puts a sprite that is not dynamic back to sleep once it has no animation or movement left
+        """
+        if not self.dynamic and self.animation_state == AnimationState.stopped and not getattr(self, "path", None):
+            self.sleep()
+
+    def kill(self):
+        """
+        Removes the sprite from all groups and hands it back to its pool, if it came from one
+        """
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
+
+class Motion:
+    """
+    Straight line move order followed through `DirectedSprite.path`, kept in the position, destination,
+    velocity and arrival radius columns of the sprite's entity store row. `EntityStore.advance_motion`
+    steps all move orders at once, each step of the path reads back the position it reached and the
+    path ends once the store has ended the order. Retargeting reassigns the columns in place.
+    """
+    __slots__ = ("store", "entity")
+
+    def __init__(self, store, entity, position, target, speed):
+        self.store = store
+        self.entity = entity
+        self.retarget(position, target, speed)
+
+    def retarget(self, position, target, speed):
+        """
+        Heads from `position` towards `target` at `speed` pixels per step
+        """
+        store, entity = self.store, self.entity
+        offset = Vector(target) - position
+        store.position[entity] = position
+        store.destination[entity] = target
+        store.velocity[entity] = offset.normalize() * speed if offset else (0, 0)
+        store.arrival_radius[entity] = speed / 2
+        store.motion[entity] = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.store.motion[self.entity]:
+            raise StopIteration
+        x, y = self.store.position[self.entity].tolist()
+        return (x, y), 0
 
 
 class DirectedSprite(Sprite):
     """
     Subclass of `Sprite` that understands basic motion and rotation.
+    `path` yields (position, angle) steps, either from a `Motion` or from a precomputed route.
+
+    Facade over a row of the shared entity store: position, move orders, waiting, whether the sprite
+    is moving and its animation timing live in store columns, moved and animated by the store's
+    systems while the sprite is in the game's layers.
     """
+    store = ENTITIES
+    waiting = Column()
+    animation_start = Column()
+    next_frame_tick = Column()
 
     def __init__(
             self,
@@ -248,23 +369,26 @@ class DirectedSprite(Sprite):
             speed=3,
             **kwargs
     ):
+        # Recycled sprites keep their row, cleared for the new entity
+        if "entity" in self.__dict__:
+            self.store.clear(self.entity)
+        else:
+            self.entity = self.store.allocate(self)
+            weakref.finalize(self, self.store.release, self.entity)
         super().__init__(**kwargs)
         self.state = state
         self.path = path
         self.speed = speed
         self.waiting = waiting
-        if position_history is None:
-            self.position_history = [[0, 0]]
-        else:
-            self.position_history = position_history
+        # Recent positions for pushing the sprite back out of walls and doors
+        self.position_history = deque([(0, 0)] if position_history is None else position_history, POSITION_HISTORY)
 
     def update(self):
+        # Frames are shown by EntityStore.animate and move orders stepped by EntityStore.advance_motion
         try:
             self.flip_check()
-            self.animate()
             if self.path and not self.waiting:
                 self.position_history.append(self.position)
-                del self.position_history[:-40]
                 position, angle = next(self.path)
                 self.position = position
                 self.move(position)
@@ -275,6 +399,23 @@ class DirectedSprite(Sprite):
             self.path = None
             if not self.waiting:
                 self.state = SpriteState.stopped
+        self.settle()
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+        self.store.moving[self.entity] = path is not None
+        self.store.motion[self.entity] = isinstance(path, Motion)
+        if path is not None:
+            self.wake()
+
+    def move(self, position, center: bool = True):
+        super().move(position, center)
+        self.store.position[self.entity] = position if center else self.rect.center
 
     def flip_check(self):
         """
@@ -289,18 +430,20 @@ class DirectedSprite(Sprite):
         else:
             self.flipped_x = False
 
+    def head_towards(self, target):
+        """
+        Moves towards `target` at `speed`, retargeting the current move order in place if there is one
+        """
+        if isinstance(self.path, Motion):
+            self.path.retarget(self.rect.center, target, self.speed)
+        else:
+            self.path = Motion(self.store, self.entity, self.rect.center, target, self.speed)
+
     def direct_movement(self, target):
         self.final_position = target
-        _v1 = Vector(target)
-        _v2 = Vector(self.rect.center)
-        if (_v1 - _v2).magnitude() < 1:
+        if Vector(self.rect.center).distance_to(target) < 1:
             return
-        distance = int(round(math.sqrt((_v1[0]-_v2[0])**2 + (_v1[1]-_v2[1])**2)))
-        vh = (_v1 - _v2).normalize() * self.speed
-        self.path = zip(
-            accumulate(repeat(vh, int(distance/2)), func=operator.add, initial=_v2),
-            repeat(0, int(distance/2)),
-        )
+        self.head_towards(target)
         self.state = SpriteState.moving
 
     def random_movement(self, interval):
@@ -312,14 +455,7 @@ class DirectedSprite(Sprite):
             int(interval * math.cos(angle) + self.rect.center[1])
         )
         self.final_position = target
-        _v1 = Vector(target)
-        _v2 = Vector(self.rect.center)
-        distance = int(round(math.sqrt((_v1[0]-_v2[0])**2 + (_v1[1]-_v2[1])**2)))
-        vh = (_v1 - _v2).normalize() * self.speed
-        self.path = zip(
-            accumulate(repeat(vh, int(distance/2)), func=operator.add, initial=_v2),
-            repeat(0, int(distance/2)),
-        )
+        self.head_towards(target)
         self.state = SpriteState.wandering
 
 
@@ -505,7 +641,16 @@ class Buff(DirectedSprite):
 
 
 class Enemy(DirectedSprite):
+    """
+    Adds health, cooldowns, movement type and AI level of detail to the entity store columns of a `DirectedSprite`
+    """
     _layer = Layer.enemy
+    health = Column()
+    cooldown_remaining = Column()
+    movement_cooldown_remaining = Column()
+    movement = movement_column()
+    ai_level = ai_level_column()
+    ai_ticks = Column()
 
     def __init__(
         self,
@@ -520,29 +665,38 @@ class Enemy(DirectedSprite):
         movement_cooldown=0,
         movement_cooldown_remaining=0,
         damaged_image=None,
+        ai_lod=AI_LOD,
+        ai_level=AILevel.far,
+        ai_ticks=0,
+        planner=None,
+        clearance=None,
         **kwargs
     ):
         # Tracks the offset, if any, if the image is flipped
         self.sprite_offset = Vector(0, 0)
-        self.health = health
         self.cooldown = cooldown
-        self.cooldown_remaining = cooldown_remaining
         self.aggro_distance = aggro_distance
         self.collision_damage = collision_damage
         self.value = value
         self.destination = destination
-        self.movement = movement
         self.movement_cooldown = movement_cooldown
-        self.movement_cooldown_remaining = movement_cooldown_remaining
         self.damaged_image = damaged_image
+        self.ai_lod = ai_lod
+        self.planner = planner
         super().__init__(**kwargs)
+        # Columns of the row claimed by DirectedSprite
+        self.health = health
+        self.cooldown_remaining = cooldown_remaining
+        self.movement = movement
+        self.movement_cooldown_remaining = movement_cooldown_remaining
+        self.ai_level = ai_level
+        self.ai_ticks = ai_ticks
+        # Nav grid clearance the enemy paths with, derived from its footprint unless given
+        self.clearance = footprint_clearance(self.image.get_size()) if clearance is None else clearance
 
     def update(self):
+        # Cooldowns are counted down for all enemies at once by EntityStore.tick_cooldowns
         super().update()
-        if self.cooldown_remaining > 0:
-            self.cooldown_remaining -= 1
-        if not self.path and self.movement_cooldown_remaining > 0:
-            self.movement_cooldown_remaining -= 1
         if not self.path and self.animation_state != AnimationState.dying:
             self.animation_state = AnimationState.stopped
             self.state = SpriteState.stopped
@@ -645,6 +799,7 @@ class Weapon(Sprite):
 class Background(Sprite):
 
     _layer = Layer.background
+    dynamic = False
 
     def update(self):
         pass
@@ -652,6 +807,7 @@ class Background(Sprite):
 
 class Wall(Sprite):
     _layer = Layer.wall
+    dynamic = False
 
     def update(self):
         pass
@@ -659,6 +815,7 @@ class Wall(Sprite):
 
 class Door(Sprite):
     _layer = Layer.door
+    dynamic = False
 
     def update(self):
         pass
@@ -666,6 +823,7 @@ class Door(Sprite):
 
 class Trap(Sprite):
     _layer = Layer.trap
+    dynamic = False
 
     def update(self):
         pass
@@ -673,6 +831,7 @@ class Trap(Sprite):
 
 class Shrub(Sprite):
     _layer = Layer.shrub
+    dynamic = False
 
     def update(self):
         pass
@@ -680,6 +839,7 @@ class Shrub(Sprite):
 
 class Health(Sprite):
     _layer = Layer.health
+    dynamic = False
 
     def update(self):
         pass
@@ -687,6 +847,8 @@ class Health(Sprite):
 
 class Debris(DirectedSprite):
     _layer = Layer.debris
+    # Woken when hit, sleeps again once its dying animation has replaced it
+    dynamic = False
 
     def __init__(
         self,
@@ -699,11 +861,97 @@ class Debris(DirectedSprite):
 
 class Menu(Sprite):
     _layer = Layer.menu
+    dynamic = False
 
     def update(self):
         pass
 
 
+class ActiveLayeredUpdates(pg.sprite.LayeredUpdates):
+    """
+    LayeredUpdates whose `update` only calls its awake sprites, in layer order, so the cost of a frame
+    follows the sprites that animate or move rather than every tile, wall and shrub of the room.
+    Sprites join and leave the awake set through `Sprite.wake` and `Sprite.sleep`, directed sprites
+    are the active rows of their entity store while they are in the group.
+    """
+
+    def __init__(self, *sprites, **kwargs):
+        self.awake = {}
+        super().__init__(*sprites, **kwargs)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if getattr(sprite, "awake", True):
+            self.awake[sprite] = None
+        if isinstance(sprite, DirectedSprite):
+            sprite.store.activate([sprite.entity])
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.awake.pop(sprite, None)
+        if isinstance(sprite, DirectedSprite):
+            sprite.store.activate([sprite.entity], False)
+
+    def wake(self, sprite):
+        if self.has_internal(sprite):
+            self.awake[sprite] = None
+
+    def sleep(self, sprite):
+        self.awake.pop(sprite, None)
+
+    def update(self, *args, **kwargs):
+        for sprite in sorted(self.awake, key=self.get_layer_of_sprite):
+            sprite.update(*args, **kwargs)
+
+
+@dataclass
+class SpritePool:
+    """
+    Free list of killed sprites of `sprite_type` for creating sprites of that type without allocating.
+
+    Acquired sprites are reinitialized in place by running `__init__` again. At most `cap` killed
+    sprites are held, any beyond that are left to be garbage collected.
+    """
+    sprite_type: type
+    cap: int = SPRITE_POOL_CAP
+    free: list = field(default_factory=list)
+    created: int = 0
+    reused: int = 0
+    released: int = 0
+    dropped: int = 0
+    high_water: int = 0
+
+    def acquire(self, **kwargs):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.__init__(**kwargs)
+            self.reused += 1
+        else:
+            sprite = self.sprite_type(**kwargs)
+            self.created += 1
+        sprite.pool = self
+        return sprite
+
+    def release(self, sprite) -> None:
+        sprite.pool = None
+        if len(self.free) >= self.cap:
+            self.dropped += 1
+            return
+        self.free.append(sprite)
+        self.released += 1
+        self.high_water = max(self.high_water, len(self.free))
+
+    def stats(self) -> dict:
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "released": self.released,
+            "dropped": self.dropped,
+            "free": len(self.free),
+            "high_water": self.high_water,
+        }
+
+
 @dataclass
 class SpriteManager:
 
@@ -712,6 +960,18 @@ class SpriteManager:
     indices: Optional[Generator[int, None, None]]
     _last_index: Optional[int] = field(init=False, default=None)
     _last_orientation: int = field(init=False, default=0)
+    pools: Dict[type, SpritePool] = field(init=False, default_factory=dict)
+
+    def pool(self, sprite_type) -> SpritePool:
+        """
+        Pool of recycled `sprite_type` sprites
+        """
+        if sprite_type not in self.pools:
+            self.pools[sprite_type] = SpritePool(sprite_type)
+        return self.pools[sprite_type]
+
+    def pool_stats(self) -> dict:
+        return {sprite_type.__name__: pool.stats() for sprite_type, pool in self.pools.items()}
 
     def create_background(self, position, orientation=None, index=None):
         self.indices = cycle(ALLOWED_BG)
@@ -738,8 +998,9 @@ class SpriteManager:
         )
         return wall
 
-    def create_debris(self, position, orientation=None, index=None):
+    def create_debris(self, position, orientation=None, index=None, spawn_id=None):
         debris = Debris.create_from_sprite(
+            spawn_id=spawn_id,
             sounds=None,
             groups=[self.layers],
             index=index,
@@ -747,18 +1008,13 @@ class SpriteManager:
             orientation=orientation,
             position=position,
             replacement=DEBRIS[index]["replacement"],
-            frames=create_animation_roll(
-                {
-                    AnimationState.dying: extend(
-                        DEBRIS[index]["anim_dying"], 6
-                    ),
-                }
-            )
+            frames=animation_clips(dying=(DEBRIS[index]["anim_dying"], 6)),
         )
         return debris
 
-    def create_trap(self, position, orientation=None, index=None):
+    def create_trap(self, position, orientation=None, index=None, spawn_id=None):
         trap = Trap.create_from_sprite(
+            spawn_id=spawn_id,
             sounds=None,
             groups=[self.layers],
             index=index,
@@ -797,31 +1053,28 @@ class SpriteManager:
         menu.move(position, False)
         return menu
 
-    def create_item(self, position, target, index=None):
+    def create_item(self, position, target, index=None, spawn_id=None):
         if index:
             base_index = index.split("_")[0].lower()
         else:
             index = self._last_index
         item = Item.create_from_sprite(
+            pool=self.pool(Item),
+            spawn_id=spawn_id,
             index=next(self.indices) if index is None else index,
             groups=[self.layers],
             state=SpriteState.stopped,
             position=position,
             base_index=base_index,
             target=target,
-            frames=create_animation_roll(
-                {
-                    AnimationState.stopped: cycle(extend(
-                        ITEM_STATS[base_index]["anim_stop"], 20
-                    )),
-                },
-            )
+            frames=animation_clips(stopped=(ITEM_STATS[base_index]["anim_stop"], 20)),
         )
         return [item]
 
-    def create_buff(self, position, target=None, cost=5, index=None):
+    def create_buff(self, position, target=None, cost=5, index=None, spawn_id=None):
         self.indices = None
         buff = Buff.create_from_sprite(
+            spawn_id=spawn_id,
             index="random" if index is None else index,
             groups=[self.layers],
             position=position,
@@ -835,16 +1088,10 @@ class SpriteManager:
             index="edwardo",
             groups=[self.layers],
             state=SpriteState.moving,
-            frames=create_animation_roll(
-                {
-                    AnimationState.walking: cycle(extend(
-                        ANIMATIONS["edward_walk"], 7
-                    )),
-                    AnimationState.stopped: cycle(extend(
-                        ANIMATIONS["edward_idle"], 20
-                    )),
-                },
-            )
+            frames=animation_clips(
+                walking=(ANIMATIONS["edward_walk"], 7),
+                stopped=(ANIMATIONS["edward_idle"], 20),
+            ),
         )
         player.move(position)
         return player
@@ -858,7 +1105,7 @@ class SpriteManager:
         weapon.move(position)
         return weapon
 
-    def create_enemy(self, position, orientation=None, index=None):
+    def create_enemy(self, position, orientation=None, index=None, spawn_id=None):
         self.indices = cycle(ALLOWED_ENEMY)
         if not index:
             index = self._last_index
@@ -870,37 +1117,32 @@ class SpriteManager:
             base_index = index.split("_")[0].lower()
         if orientation is None:
             orientation = self._last_orientation
+        stats = ENEMY_STATS[base_index]
         enemy = Enemy.create_from_sprite(
+            spawn_id=spawn_id,
             index=next(self.indices) if index is None else index,
             groups=[self.layers],
             state=SpriteState.stopped,
             sounds=None,
             position=position,
-            value=ENEMY_STATS[base_index]["value"],
-            health=ENEMY_STATS[base_index]["health"],
-            speed=ENEMY_STATS[base_index]["speed"],
-            collision_damage=ENEMY_STATS[base_index]["collision_damage"],
-            aggro_distance=ENEMY_STATS[base_index]["aggro_distance"],
-            movement=ENEMY_STATS[base_index]["movement"],
-            movement_cooldown=ENEMY_STATS[base_index]["movement_cooldown"],
-            damaged_image=ENEMY_STATS[base_index]["damaged_image"],
-            frames=create_animation_roll(
-                {
-                    AnimationState.dying: extend(
-                        ENEMY_STATS[base_index]["anim_dying"], 5
-                    ),
-                    AnimationState.walking: cycle(extend(
-                        ENEMY_STATS[base_index]["anim_walk"], 7
-                    )),
-                    AnimationState.stopped: cycle(extend(
-                        ENEMY_STATS[base_index]["anim_stop"], 20
-                    )),
-                },
+            value=stats["value"],
+            health=stats["health"],
+            speed=stats["speed"],
+            collision_damage=stats["collision_damage"],
+            aggro_distance=stats["aggro_distance"],
+            movement=stats["movement"],
+            movement_cooldown=stats["movement_cooldown"],
+            damaged_image=stats["damaged_image"],
+            ai_lod=stats["ai_lod"],
+            frames=animation_clips(
+                dying=(stats["anim_dying"], 5),
+                walking=(stats["anim_walk"], 7),
+                stopped=(stats["anim_stop"], 20),
             ),
         )
         return enemy
 
-    def create_shrub(self, position, orientation=None, index=None):
+    def create_shrub(self, position, orientation=None, index=None, spawn_id=None):
         """
         Factory that creates a shrub sprite at a given `position`,
         with optional `index` and `orientation`.
@@ -913,6 +1155,7 @@ class SpriteManager:
         if orientation is None:
             orientation = self._last_orientation
         shrub = Shrub.create_from_sprite(
+            spawn_id=spawn_id,
             sounds=None,
             groups=[self.layers],
             index=next(self.indices) if index is None else index,
@@ -946,6 +1189,7 @@ class SpriteManager:
         for _ in range(2):
             next(path)
         projectile = Projectile.create_from_sprite(
+            pool=self.pool(Projectile),
             position=source,
             groups=[self.layers],
             orientation=0,
@@ -953,13 +1197,7 @@ class SpriteManager:
             index="projectile",
             damage=damage,
             knockback=knockback,
-            frames=create_animation_roll(
-                {
-                    AnimationState.exploding: extend(
-                        ANIMATIONS["projectile_explode"], 2
-                    ),
-                },
-            ),
+            frames=animation_clips(exploding=(ANIMATIONS["projectile_explode"], 2)),
             path=path,
             sounds=None,
         )
@@ -1062,14 +1300,3 @@ class SpriteManager:
         """
         for sprite in self.sprites:
             sprite.kill()
-
-
-def create_animation_roll(frames: Dict[AnimationState, Generator[int, None, None]]):
-    """
-    Takes a dictionary of animation states (as keys) and frame
-    generators (as values) and fills out the missing ones with `None`.
-    """
-    for state in AnimationState:
-        if state not in frames:
-            frames[state] = None
-    return frames
@@ -0,0 +1,416 @@
+import json
+import os
+import struct
+import numpy as np
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+from dreamcenter.loader import import_level
+
+# Spawn record groups of a level file, in the order they are stored in a template
+SPAWN_KINDS = ("shrubs", "enemies", "traps", "buffs", "items")
+# Spawn kinds stored with an orientation
+ORIENTED_KINDS = ("shrubs", "enemies", "traps")
+
+# Binary level format: magic, version, tile rows and columns, string table size, followed by
+# the string table (length prefixed utf-8), the tile id and orientation arrays and for every
+# spawn kind a record count and its packed records
+BINARY_LEVEL_SUFFIX = ".dclv"
+LEVEL_MAGIC = b"DCLV"
+LEVEL_FORMAT_VERSION = 1
+LEVEL_HEADER = struct.Struct("<4sHHHH")
+RECORD_COUNT = struct.Struct("<H")
+SPAWN_RECORD = np.dtype([("index", "<u2"), ("x", "<i4"), ("y", "<i4"), ("orientation", "<u2")])
+# Orientation stored for spawns without one
+NO_ORIENTATION = 0xFFFF
+
+# Binary room delta format: magic, string table size (the template name first) and record count,
+# followed by the string table and one packed record per removed, changed or added spawn.
+# Removed spawns have no index, added spawns no template record number.
+DELTA_MAGIC = b"DCRD"
+DELTA_HEADER = struct.Struct("<4sHH")
+DELTA_RECORD = np.dtype(
+    [("kind", "u1"), ("number", "<u2"), ("index", "<u2"), ("x", "<i4"), ("y", "<i4"), ("orientation", "<u2")]
+)
+NO_RECORD = 0xFFFF
+
+
+def pack_strings(strings) -> bytes:
+    """
+    String table of length prefixed utf-8 strings
+    """
+    chunks = []
+    for string in strings:
+        encoded = string.encode("utf-8")
+        chunks.append(bytes([len(encoded)]) + encoded)
+    return b"".join(chunks)
+
+
+def unpack_strings(payload, offset, count) -> tuple:
+    """
+    Reads `count` strings of a string table starting at `offset`, returns them and the offset after the table
+    """
+    strings = []
+    for _ in range(count):
+        length = payload[offset]
+        strings.append(payload[offset + 1:offset + 1 + length].decode("utf-8"))
+        offset += 1 + length
+    return strings, offset
+
+
+class Spawn(NamedTuple):
+    """
+    A sprite placed in a level. Buffs and items have no orientation.
+    """
+    index: str
+    position: Tuple[int, int]
+    orientation: Optional[int] = None
+
+    def as_dict(self) -> dict:
+        record = {"index": self.index, "position": self.position}
+        if self.orientation is not None:
+            record["orientation"] = self.orientation
+        return record
+
+
+@dataclass(frozen=True)
+class RoomTemplate:
+    """
+    Compact immutable form of a level file.
+
+    Background tiles are stored as an array of ids into the `tile_names` string table
+    plus an array of orientations, both indexed [y][x]. Every other sprite is kept as
+    tuples of `Spawn` records. Rooms are instantiated with `level_data`, which returns
+    fresh dicts in the level file format so a room can never modify the template.
+    """
+    name: str
+    tile_names: Tuple[str, ...]
+    tiles: np.ndarray
+    orientations: np.ndarray
+    shrubs: Tuple[Spawn, ...] = ()
+    enemies: Tuple[Spawn, ...] = ()
+    traps: Tuple[Spawn, ...] = ()
+    buffs: Tuple[Spawn, ...] = ()
+    items: Tuple[Spawn, ...] = ()
+
+    @classmethod
+    def from_data(cls, name, data) -> "RoomTemplate":
+        """
+        Builds a template from decoded level file `data`
+        """
+        tile_names = tuple(sorted({tile["index"] for row in data["background"] for tile in row}))
+        tile_ids = {tile_name: tile_id for tile_id, tile_name in enumerate(tile_names)}
+        tiles = np.array(
+            [[tile_ids[tile["index"]] for tile in row] for row in data["background"]], dtype=np.uint8
+        )
+        orientations = np.array(
+            [[tile["orientation"] for tile in row] for row in data["background"]], dtype=np.uint16
+        )
+        tiles.setflags(write=False)
+        orientations.setflags(write=False)
+        spawns = {
+            kind: tuple(
+                Spawn(record["index"], tuple(record["position"]), record.get("orientation"))
+                for record in data.get(kind) or ()
+            )
+            for kind in SPAWN_KINDS
+        }
+        return cls(name=name, tile_names=tile_names, tiles=tiles, orientations=orientations, **spawns)
+
+    @classmethod
+    def from_bytes(cls, name, payload) -> "RoomTemplate":
+        """
+        Builds a template from a level in the binary level format
+        """
+        magic, version, rows, columns, string_count = LEVEL_HEADER.unpack_from(payload)
+        if magic != LEVEL_MAGIC:
+            raise ValueError(f"{name} is not a binary level")
+        if version != LEVEL_FORMAT_VERSION:
+            raise ValueError(f"{name} uses unsupported level format version {version}")
+        strings, offset = unpack_strings(payload, LEVEL_HEADER.size, string_count)
+        tile_count = rows * columns
+        tile_names = tuple(strings)
+        tiles = np.frombuffer(payload, dtype=np.uint8, count=tile_count, offset=offset).reshape(rows, columns)
+        offset += tile_count
+        orientations = np.frombuffer(payload, dtype="<u2", count=tile_count, offset=offset).reshape(rows, columns)
+        offset += tile_count * 2
+        spawns = {}
+        for kind in SPAWN_KINDS:
+            (count,) = RECORD_COUNT.unpack_from(payload, offset)
+            offset += RECORD_COUNT.size
+            records = np.frombuffer(payload, dtype=SPAWN_RECORD, count=count, offset=offset)
+            offset += count * SPAWN_RECORD.itemsize
+            spawns[kind] = tuple(
+                Spawn(strings[index], (x, y), None if orientation == NO_ORIENTATION else orientation)
+                for index, x, y, orientation in records.tolist()
+            )
+        return cls(
+            name=name,
+            tile_names=tile_names,
+            tiles=tiles.astype(np.uint8),
+            orientations=orientations.astype(np.uint16),
+            **spawns,
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the template in the binary level format
+        """
+        strings = list(self.tile_names)
+        string_ids = {string: string_id for string_id, string in enumerate(strings)}
+        for kind in SPAWN_KINDS:
+            for spawn in getattr(self, kind):
+                if spawn.index not in string_ids:
+                    string_ids[spawn.index] = len(strings)
+                    strings.append(spawn.index)
+        rows, columns = self.tiles.shape
+        chunks = [
+            LEVEL_HEADER.pack(LEVEL_MAGIC, LEVEL_FORMAT_VERSION, rows, columns, len(strings)),
+            pack_strings(strings),
+        ]
+        chunks.append(self.tiles.astype(np.uint8).tobytes())
+        chunks.append(self.orientations.astype("<u2").tobytes())
+        for kind in SPAWN_KINDS:
+            spawns = getattr(self, kind)
+            records = np.array(
+                [
+                    (
+                        string_ids[spawn.index],
+                        round(spawn.position[0]),
+                        round(spawn.position[1]),
+                        NO_ORIENTATION if spawn.orientation is None else spawn.orientation,
+                    )
+                    for spawn in spawns
+                ],
+                dtype=SPAWN_RECORD,
+            )
+            chunks.append(RECORD_COUNT.pack(len(spawns)))
+            chunks.append(records.tobytes())
+        return b"".join(chunks)
+
+    def background(self) -> list:
+        """
+        Raw tile map of {"index", "orientation"} dicts as stored in level files
+        """
+        return [
+            [
+                {"index": self.tile_names[tile_id], "orientation": orientation}
+                for tile_id, orientation in zip(tile_row, orientation_row)
+            ]
+            for tile_row, orientation_row in zip(self.tiles.tolist(), self.orientations.tolist())
+        ]
+
+    def tile_indices(self) -> list:
+        """
+        Tile index names indexed [y][x]
+        """
+        return [[self.tile_names[tile_id] for tile_id in row] for row in self.tiles.tolist()]
+
+    def level_data(self) -> dict:
+        """
+        Fresh level data in the format of a level file
+        """
+        data = {"background": self.background()}
+        for kind in SPAWN_KINDS:
+            data[kind] = [spawn.as_dict() for spawn in getattr(self, kind)]
+        return data
+
+
+@dataclass(frozen=True)
+class RoomDelta:
+    """
+    State of a visited room kept as the difference to the template it was loaded from.
+
+    Spawns of the template are addressed by (kind, record number) spawn ids, which every sprite
+    loaded from a template carries in `spawn_id`. Killed enemies, bought buffs and collected
+    items are listed in `removed`, template sprites that moved or changed index, such as destroyed
+    debris or rolled random buffs, keep their current record in `changed` and sprites that are
+    not part of the template, such as dropped items, are kept per kind in `added`.
+    An empty delta is the untouched template.
+    """
+    template: RoomTemplate
+    removed: FrozenSet[Tuple[str, int]] = frozenset()
+    changed: Dict[Tuple[str, int], Spawn] = field(default_factory=dict)
+    added: Dict[str, Tuple[Spawn, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def capture(cls, template, sprites) -> "RoomDelta":
+        """
+        Builds the delta of a room loaded from `template` from its current `sprites`,
+        a dict of the sprites in the room per spawn kind
+        """
+        removed = {(kind, number) for kind in SPAWN_KINDS for number in range(len(getattr(template, kind)))}
+        changed = {}
+        added = {}
+        for kind, kind_sprites in sprites.items():
+            for sprite in kind_sprites:
+                if getattr(sprite, "health", 1) <= 0:
+                    continue
+                spawn = Spawn(
+                    sprite.index,
+                    tuple(sprite.rect.center),
+                    sprite.orientation if kind in ORIENTED_KINDS else None,
+                )
+                if sprite.spawn_id is None:
+                    added.setdefault(kind, []).append(spawn)
+                    continue
+                removed.discard(sprite.spawn_id)
+                if spawn != getattr(template, kind)[sprite.spawn_id[1]]:
+                    changed[sprite.spawn_id] = spawn
+        return cls(
+            template=template,
+            removed=frozenset(removed),
+            changed=changed,
+            added={kind: tuple(spawns) for kind, spawns in added.items()},
+        )
+
+    @classmethod
+    def from_bytes(cls, payload, template) -> "RoomDelta":
+        """
+        Decodes a delta against `template` from the binary room delta format
+        """
+        magic, string_count, record_count = DELTA_HEADER.unpack_from(payload)
+        if magic != DELTA_MAGIC:
+            raise ValueError("Not a binary room delta")
+        strings, offset = unpack_strings(payload, DELTA_HEADER.size, string_count)
+        if strings[0] != template.name:
+            raise ValueError(f"Room delta of {strings[0]} does not apply to {template.name}")
+        records = np.frombuffer(payload, dtype=DELTA_RECORD, count=record_count, offset=offset)
+        removed = set()
+        changed = {}
+        added = {}
+        for kind_id, number, index, x, y, orientation in records.tolist():
+            kind = SPAWN_KINDS[kind_id]
+            if index == NO_RECORD:
+                removed.add((kind, number))
+                continue
+            spawn = Spawn(strings[index], (x, y), None if orientation == NO_ORIENTATION else orientation)
+            if number == NO_RECORD:
+                added.setdefault(kind, []).append(spawn)
+            else:
+                changed[(kind, number)] = spawn
+        return cls(
+            template=template,
+            removed=frozenset(removed),
+            changed=changed,
+            added={kind: tuple(spawns) for kind, spawns in added.items()},
+        )
+
+    @staticmethod
+    def template_name(payload) -> str:
+        """
+        Name of the template a delta in the binary room delta format applies to
+        """
+        strings, _ = unpack_strings(payload, DELTA_HEADER.size, 1)
+        return strings[0]
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the delta in the binary room delta format, the template is stored by name only
+        """
+        strings = [self.template.name]
+        string_ids = {}
+
+        def record(spawn_id, spawn):
+            kind, number = spawn_id
+            if spawn is None:
+                return SPAWN_KINDS.index(kind), number, NO_RECORD, 0, 0, NO_ORIENTATION
+            if spawn.index not in string_ids:
+                string_ids[spawn.index] = len(strings)
+                strings.append(spawn.index)
+            return (
+                SPAWN_KINDS.index(kind),
+                number,
+                string_ids[spawn.index],
+                round(spawn.position[0]),
+                round(spawn.position[1]),
+                NO_ORIENTATION if spawn.orientation is None else spawn.orientation,
+            )
+
+        records = [record(spawn_id, None) for spawn_id in sorted(self.removed)]
+        records.extend(record(spawn_id, spawn) for spawn_id, spawn in self.changed.items())
+        records.extend(
+            record((kind, NO_RECORD), spawn) for kind, spawns in self.added.items() for spawn in spawns
+        )
+        records = np.array(records, dtype=DELTA_RECORD)
+        return b"".join((
+            DELTA_HEADER.pack(DELTA_MAGIC, len(strings), len(records)),
+            pack_strings(strings),
+            records.tobytes(),
+        ))
+
+    def level_data(self) -> dict:
+        """
+        Fresh level data of the room in the format of a level file, with the spawn id
+        of every record taken from the template in "spawn_id"
+        """
+        data = {"background": self.template.background()}
+        for kind in SPAWN_KINDS:
+            records = []
+            for number, spawn in enumerate(getattr(self.template, kind)):
+                spawn_id = (kind, number)
+                if spawn_id in self.removed:
+                    continue
+                record = self.changed.get(spawn_id, spawn).as_dict()
+                record["spawn_id"] = spawn_id
+                records.append(record)
+            records.extend(spawn.as_dict() for spawn in self.added.get(kind, ()))
+            data[kind] = records
+        return data
+
+
+def decode_level(name, payload) -> RoomTemplate:
+    """
+    Builds a template from the contents of a level file in either the binary or the JSON level format
+    """
+    if isinstance(payload, bytes) and payload.startswith(LEVEL_MAGIC):
+        return RoomTemplate.from_bytes(name, payload)
+    return RoomTemplate.from_data(name, json.loads(payload))
+
+
+def encode_level(data, binary=False):
+    """
+    Encodes decoded level `data` for writing to a level file, as JSON text or in the binary level format
+    """
+    if binary:
+        return RoomTemplate.from_data("", data).to_bytes()
+    return json.dumps(data)
+
+
+@lru_cache(maxsize=None)
+def room_template(level) -> RoomTemplate:
+    """
+    Template of the packaged level `level`, parsed once per process.
+    The binary level is preferred over the JSON level when both are packaged.
+    """
+    try:
+        with import_level(level + BINARY_LEVEL_SUFFIX, "rb") as level_file:
+            return RoomTemplate.from_bytes(level, level_file.read())
+    except FileNotFoundError:
+        pass
+    with import_level(level + ".json") as level_file:
+        return RoomTemplate.from_data(level, json.loads(level_file.read()))
+
+
+# Templates of level files opened by path, keyed by path and kept with the modification time they were parsed at
+_file_templates = {}
+
+
+def template_from_file(file_obj) -> RoomTemplate:
+    """
+    Template of an open level file in either format. Files on disk are parsed again only when
+    they have been modified since they were last parsed, anything else is parsed every time.
+    """
+    path = getattr(file_obj, "name", None)
+    if not isinstance(path, str) or not os.path.isfile(path):
+        return decode_level(str(path), file_obj.read())
+    path = os.path.abspath(path)
+    modified = os.stat(path).st_mtime_ns
+    cached = _file_templates.get(path)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+    # Reopened in binary so text mode handles can open binary levels too
+    with open(path, "rb") as level_file:
+        template = decode_level(os.path.splitext(os.path.basename(path))[0], level_file.read())
+    _file_templates[path] = (modified, template)
+    return template
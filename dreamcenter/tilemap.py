@@ -0,0 +1,77 @@
+import numpy as np
+from dataclasses import dataclass
+from dreamcenter.registry import REGISTRY, IS_WALL, IS_DOOR
+from dreamcenter.path_finding import walkable_grid
+from dreamcenter.constants import TILES_X, TILES_Y
+
+
+@dataclass
+class Tilemap:
+    """
+    Background of a room as arrays of registry tile ids and orientations indexed [y][x].
+    Holds only what a level records about its tiles, the sprites drawn for them are made by `draw_background`.
+    """
+    ids: np.ndarray
+    orientations: np.ndarray
+
+    @classmethod
+    def from_raw(cls, raw_tile_map) -> "Tilemap":
+        """
+        Creates a tile map given a raw tile map of {"index", "orientation"} dicts sourced from a level save file.
+        """
+        return cls(
+            ids=np.array([[REGISTRY.id(tile["index"]) for tile in row] for row in raw_tile_map], dtype=np.intp),
+            orientations=np.array([[tile["orientation"] for tile in row] for row in raw_tile_map], dtype=np.int16),
+        )
+
+    @classmethod
+    def filled(cls, index, orientation=0) -> "Tilemap":
+        return cls(
+            ids=np.full((TILES_Y, TILES_X), REGISTRY.id(index), dtype=np.intp),
+            orientations=np.full((TILES_Y, TILES_X), orientation, dtype=np.int16),
+        )
+
+    def index(self, y, x) -> str:
+        return REGISTRY.names[self.ids[y, x]]
+
+    def orientation(self, y, x) -> int:
+        return int(self.orientations[y, x])
+
+    def set(self, y, x, index, orientation) -> None:
+        self.ids[y, x] = REGISTRY.id(index)
+        self.orientations[y, x] = orientation
+
+    def flags(self) -> np.ndarray:
+        return REGISTRY.flag_array[self.ids]
+
+    def is_wall(self) -> np.ndarray:
+        return (self.flags() & IS_WALL).astype(bool)
+
+    def is_door(self) -> np.ndarray:
+        return (self.flags() & IS_DOOR).astype(bool)
+
+    def walkable(self) -> np.ndarray:
+        """
+        Half tile nav grid, each tile broken apart into the 4 quadrants of its TILE_MAPS entry
+        """
+        return walkable_grid(self.ids)
+
+    @staticmethod
+    def neighbours(tiles) -> np.ndarray:
+        """
+        Mask of the tiles orthogonally next to a tile set in the boolean mask `tiles`
+        """
+        padded = np.pad(tiles, 1)
+        return padded[:-2, 1:-1] | padded[2:, 1:-1] | padded[1:-1, :-2] | padded[1:-1, 2:]
+
+    def raw(self) -> list:
+        """
+        Raw tile map of {"index", "orientation"} dicts as stored in level files
+        """
+        return [
+            [
+                {"index": REGISTRY.names[tile_id], "orientation": orientation}
+                for tile_id, orientation in zip(id_row, orientation_row)
+            ]
+            for id_row, orientation_row in zip(self.ids.tolist(), self.orientations.tolist())
+        ]
@@ -0,0 +1,434 @@
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import click
+import numpy as np
+import pygame as pg
+from pathfinding.core.grid import Grid
+from pathfinding.core.diagonal_movement import DiagonalMovement
+from pathfinding.finder.a_star import AStarFinder
+from dreamcenter.constants import LEVEL_CONNECTIONS, MAP_GRID_UPPER_MAX
+from dreamcenter.path_finding import walkable_matrix, jump_point_search, octile, NavGrid, CELL_SIZE
+from dreamcenter.replanning import DStarLite
+from dreamcenter.map_logic import Map
+from dreamcenter.hierarchy import DungeonGraph, SIDE_OFFSETS, OPPOSITE
+from dreamcenter.game import DreamGame
+from dreamcenter.game_state import GameState
+from dreamcenter.enumeration import AnimationState, Layer
+from dreamcenter.templates import room_template, decode_level, BINARY_LEVEL_SUFFIX
+
+LEVELS_DIRECTORY = os.path.join(os.path.dirname(__file__), "assets", "levels")
+
+# Map statistics collected by bench-maps, each reported as a histogram
+MAP_STATS = ("rooms", "dead_ends", "shop_distance", "branch_depth", "generation_ms")
+# Failing seeds kept per kind of failure so they can be reproduced
+FAILURE_SAMPLES = 10
+
+
+@click.group()
+def cli():
+    """
+    Developer tools for benchmarking and maintaining game assets
+    """
+
+
+@cli.command(name="bench-pathfinding", help="compares jump point search with A* on every level")
+@click.option("--queries", default=200, help="random start/end pairs per level")
+@click.option("--seed", default=0, help="seed for choosing start/end pairs")
+def bench_pathfinding(queries, seed):
+    rng = random.Random(seed)
+    finder = AStarFinder(diagonal_movement=DiagonalMovement.if_at_most_one_obstacle)
+    totals = {"a_star": 0.0, "jps": 0.0}
+
+    click.echo(f"{'level':<16}{'A* ms':>10}{'JPS ms':>10}{'speedup':>10}")
+    for level in LEVEL_CONNECTIONS:
+        walkable = walkable_matrix(room_template(level).tile_indices())
+        cells = list(zip(*np.nonzero(walkable)))
+        pairs = [
+            ((int(sx), int(sy)), (int(ex), int(ey)))
+            for (sy, sx), (ey, ex) in (rng.sample(cells, 2) for _ in range(queries))
+        ]
+        grid = Grid(matrix=walkable.astype(int).tolist())
+
+        started = time.perf_counter()
+        for start, end in pairs:
+            finder.find_path(grid.node(*start), grid.node(*end), grid)
+            grid.cleanup()
+        a_star = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for start, end in pairs:
+            jump_point_search(walkable, start, end)
+        jps = time.perf_counter() - started
+
+        totals["a_star"] += a_star
+        totals["jps"] += jps
+        click.echo(
+            f"{level:<16}{a_star * 1000 / queries:>10.3f}{jps * 1000 / queries:>10.3f}{a_star / jps:>9.1f}x"
+        )
+    click.echo(f"{'total':<16}{totals['a_star'] * 1000:>10.1f}{totals['jps'] * 1000:>10.1f}"
+               f"{totals['a_star'] / totals['jps']:>9.1f}x")
+
+
+def path_cost(path) -> float:
+    return sum(octile(bx - ax, by - ay) for (ax, ay), (bx, by) in zip(path, path[1:]))
+
+
+@cli.command(name="check-replanning", help="checks incremental D* Lite replans against jump point search")
+@click.option("--chases", default=20, help="chases per level and clearance")
+@click.option("--replans", default=12, help="replans per chase")
+@click.option("--seed", default=0, help="seed for the chases and obstacle changes")
+def check_replanning(chases, replans, seed):
+    """
+    Chases a fixed goal from a moving start while random props are stamped into and removed from
+    the nav grid, and compares the cost of every incremental replan with a fresh jump point search.
+    Exits with an error if any replan is not optimal.
+    """
+    rng = random.Random(seed)
+    checked = 0
+    wrong = []
+    for level in LEVEL_CONNECTIONS:
+        nav_grid = NavGrid(walkable_matrix(room_template(level).tile_indices()))
+        height, width = nav_grid.shape
+        for clearance in (1, 2):
+            for _ in range(chases):
+                planner = DStarLite(nav_grid, clearance=clearance, goal_tolerance=0)
+                cells = list(zip(*np.nonzero(nav_grid.passable(clearance))))
+                if len(cells) < 2:
+                    continue
+                (gy, gx), (sy, sx) = rng.sample(cells, 2)
+                goal, start = (int(gx), int(gy)), (int(sx), int(sy))
+                path = []
+                for _ in range(replans):
+                    for _ in range(rng.randint(0, 3)):
+                        if nav_grid.stamps and rng.random() < 0.5:
+                            nav_grid.unstamp(rng.choice(list(nav_grid.stamps)))
+                        else:
+                            rect = pg.Rect(
+                                rng.randrange(width) * CELL_SIZE, rng.randrange(height) * CELL_SIZE,
+                                rng.choice((1, 2, 3)) * CELL_SIZE, rng.choice((1, 2, 3)) * CELL_SIZE,
+                            )
+                            nav_grid.stamp(object(), rect)
+                    if path:
+                        start = path[min(len(path) - 1, rng.randint(0, 6))]
+                    passable = nav_grid.passable(clearance)
+                    if not (passable[start[1], start[0]] and passable[goal[1], goal[0]]):
+                        path = []
+                        continue
+                    path = planner.plan(start, goal)
+                    expected = jump_point_search(passable, start, goal)
+                    checked += 1
+                    if bool(path) != bool(expected) or abs(path_cost(path) - path_cost(expected)) > 1e-6:
+                        wrong.append((level, clearance, start, goal, path_cost(path), path_cost(expected)))
+            for key in list(nav_grid.stamps):
+                nav_grid.unstamp(key)
+
+    for level, clearance, start, goal, cost, expected in wrong:
+        click.echo(f"{level:<16} clearance {clearance} {start} -> {goal}: {cost:.2f}, expected {expected:.2f}")
+    click.echo(f"{checked} replans checked, {len(wrong)} wrong")
+    if wrong:
+        raise click.ClickException("incremental replans differ from jump point search")
+
+
+@cli.command(name="check-room-suspension", help="checks enemies killed just before leaving a room die")
+@click.option("--rooms", default=20, help="rooms to clear and leave")
+@click.option("--frames", default=100, help="frames drawn after returning to a room")
+@click.option("--seed", default=0, help="seed for the map and the doors taken")
+def check_room_suspension(rooms, frames, seed):
+    """
+    Kills the enemies of a room the way projectiles do and leaves it through a random door before the next
+    perception pass, then returns and draws `frames` frames. Every killed enemy must have been handled as
+    dead, leaving the enemy group and dying rather than staying frozen in the resumed room.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    rng = random.Random(seed)
+    random.seed(seed)
+    game = DreamGame.create()
+    game.set_state(GameState.game_playing)
+    game_play = game.game_play
+    game_play.generate_map()
+    game_play.change_level()
+    checked = 0
+    frozen = []
+    for _ in range(rooms):
+        killed = game_play.layers.get_sprites_from_layer(Layer.enemy)
+        for enemy in killed:
+            enemy.health = 0
+            game_play.layers.change_layer(enemy, Layer.shrub)
+        row, column = game_play.level_position
+        sides = [
+            side for side, (dy, dx) in SIDE_OFFSETS.items()
+            if game_play.map_manager.level_at((row + dy, column + dx)) != "blank"
+        ]
+        side = rng.choice(sides)
+        game_play.change_level(side)
+        game_play.change_level(OPPOSITE[side])
+        for _ in range(frames):
+            game_play.draw()
+        for enemy in killed:
+            checked += 1
+            if enemy in game_play.enemy_group.enemies or (
+                enemy.frames is not None and enemy.animation_state is not AnimationState.dying
+            ):
+                frozen.append((tuple(game_play.level_position), enemy.index))
+        game_play.change_level(side)
+
+    for position, index in frozen:
+        click.echo(f"{index} in room {position} was not handled as dead")
+    click.echo(f"{checked} killed enemies checked, {len(frozen)} frozen")
+    if frozen:
+        raise click.ClickException("enemies killed before leaving a room were not handled as dead")
+
+
+def door_distances(graph, order, skipped_room=None) -> np.ndarray:
+    """
+    All pairs distances between the door nodes of `graph` by Floyd-Warshall, indexed by `order`,
+    optionally without the doors of `skipped_room`
+    """
+    distances = np.full((len(order), len(order)), np.inf)
+    np.fill_diagonal(distances, 0.0)
+    for node, edges in graph.edges.items():
+        if node[:2] == skipped_room:
+            continue
+        for neighbour, cost in edges:
+            if neighbour[:2] != skipped_room:
+                distances[order[node], order[neighbour]] = min(distances[order[node], order[neighbour]], cost)
+    for via in range(len(order)):
+        distances = np.minimum(distances, distances[:, via, None] + distances[None, via, :])
+    return distances
+
+
+@cli.command(name="check-dungeon-graph", help="checks door graph route queries against all pairs distances")
+@click.option("--maps", default=20, help="maps to generate")
+@click.option("--queries", default=50, help="random queries per map")
+@click.option("--seed-amt", default=32, help="rooms grown from the start of each map")
+@click.option("--seed", default=0, help="seed of the first map and of the queries")
+def check_dungeon_graph(maps, queries, seed_amt, seed):
+    """
+    Builds the door graph of generated maps and compares DungeonGraph.next_door and
+    DungeonGraph.distance_to_type with all pairs door distances from Floyd-Warshall.
+    The next door is right when walking to it inside the room, then leaving through it
+    without coming back, still takes a shortest route to the target room.
+    Exits with an error if any answer is not optimal.
+    """
+    rng = random.Random(seed)
+    checked = 0
+    wrong = []
+    size = MAP_GRID_UPPER_MAX
+    start = (size // 2 - 1, size // 2 - 1)
+    for map_seed in range(seed, seed + maps):
+        map_manager = Map(seed=map_seed, seed_amt=seed_amt, size=size, start=start)
+        map_manager.set_starting_growth(seed_amt)
+        map_manager.generate_map()
+        graph = DungeonGraph.from_map(map_manager)
+        order = {node: index for index, node in enumerate(graph.edges)}
+        distances = door_distances(graph, order)
+        rooms = list(graph.rooms)
+
+        def room_distance(node, room, distances=distances):
+            return min(distances[order[node], order[(*room, side)]] for side in graph.sides(room))
+
+        for _ in range(queries):
+            node = rng.choice(list(order))
+            room, side = node[:2], node[2]
+            target = rng.choice([other for other in rooms if other != room])
+            expected = room_distance(node, target)
+            door = graph.next_door(room, side, target)
+            outside = door_distances(graph, order, skipped_room=room)
+            # The door of the neighbouring room faced by each door of `room`, if that room is in the map
+            exits = {
+                door_side: next(
+                    (neighbour for neighbour, _ in graph.edges[(*room, door_side)] if neighbour[:2] != room), None
+                )
+                for door_side in graph.sides(room)
+            }
+            if door is None or exits.get(door) is None:
+                route = math.inf
+            else:
+                route = distances[order[node], order[(*room, door)]] + room_distance(
+                    exits[door], target, distances=outside
+                )
+            checked += 1
+            if abs(route - expected) > 1e-6:
+                wrong.append((map_seed, "next_door", node, target, route, expected))
+
+            distance, shop = graph.distance_to_type(room, side, "shop")
+            shops = [
+                other for other in rooms
+                if other != room and LEVEL_CONNECTIONS[graph.rooms[other]]["type"] == "shop"
+            ]
+            expected = min((room_distance(node, other) for other in shops), default=math.inf)
+            found = math.inf if shop is None else room_distance(node, shop)
+            checked += 1
+            if abs(distance - expected) > 1e-6 or abs(found - expected) > 1e-6:
+                wrong.append((map_seed, "distance_to_type", node, shop, distance, expected))
+
+    for map_seed, query, node, target, distance, expected in wrong:
+        click.echo(f"map {map_seed} {query} {node} -> {target}: {distance:.2f}, expected {expected:.2f}")
+    click.echo(f"{checked} queries checked, {len(wrong)} wrong")
+    if wrong:
+        raise click.ClickException("door graph queries are not on shortest routes")
+
+
+def map_stats(seed, seed_amt, size) -> dict:
+    """
+    Generates the map of `seed` and measures it. Distances are counted in rooms from the start.
+    """
+    start = (size // 2 - 1, size // 2 - 1)
+    started = time.perf_counter()
+    map_manager = Map(seed=seed, seed_amt=seed_amt, size=size, start=start)
+    map_manager.set_starting_growth(seed_amt)
+    map_manager.generate_map()
+    generation_ms = (time.perf_counter() - started) * 1000
+
+    graph = DungeonGraph(rooms=dict(map_manager.rooms()))
+    hops = graph.room_distances(start)
+    shops = [hops[room] for room, level in graph.rooms.items() if LEVEL_CONNECTIONS[level]["type"] == "shop"]
+    return {
+        "rooms": len(graph.rooms),
+        "dead_ends": sum(len(graph.sides(room)) == 1 for room in graph.rooms),
+        "shop_distance": min(shops) if shops else None,
+        "branch_depth": max(hops.values()),
+        "generation_ms": round(generation_ms, 1),
+    }
+
+
+def map_stats_chunk(seeds, seed_amt, size) -> tuple:
+    """
+    Measures the maps of `seeds` in a worker process.
+    Returns a histogram per statistic and the failing seeds per kind of failure.
+    """
+    histograms = {name: Counter() for name in MAP_STATS}
+    failures = {}
+    for seed in seeds:
+        try:
+            stats = map_stats(seed, seed_amt, size)
+        except Exception as error:
+            failures.setdefault(f"{type(error).__name__}: {error}", []).append(seed)
+            continue
+        for name, value in stats.items():
+            histograms[name][value] += 1
+    return histograms, failures
+
+
+def summarize(histogram) -> dict:
+    """
+    Summary of a histogram of values, `None` values are counted but left out of min, max and mean
+    """
+    values = sorted(value for value in histogram if value is not None)
+    measured = sum(histogram[value] for value in values)
+    summary = {"count": sum(histogram.values())}
+    if values:
+        summary.update(
+            min=values[0],
+            max=values[-1],
+            mean=round(sum(value * histogram[value] for value in values) / measured, 3),
+        )
+    summary["histogram"] = {str(value): histogram[value] for value in values}
+    if None in histogram:
+        summary["histogram"]["none"] = histogram[None]
+    return summary
+
+
+@cli.command(name="bench-maps", help="generates many maps in parallel and reports statistics as JSON")
+@click.option("--maps", default=1000, help="number of maps to generate")
+@click.option("--seed-amt", default=32, help="rooms grown from the start of each map")
+@click.option("--size", default=MAP_GRID_UPPER_MAX, help="rooms along each side of the map grid")
+@click.option("--first-seed", default=0, help="seed of the first map, the rest follow consecutively")
+@click.option("--workers", default=None, type=int, help="worker processes, defaults to the number of CPUs")
+@click.option("--chunk-size", default=500, help="maps handed to a worker at a time")
+@click.option("--output", type=click.File("w"), default="-", help="file to write the JSON report to")
+def bench_maps(maps, seed_amt, size, first_seed, workers, chunk_size, output):
+    seeds = range(first_seed, first_seed + maps)
+    chunks = [seeds[start:start + chunk_size] for start in range(0, maps, chunk_size)]
+    histograms = {name: Counter() for name in MAP_STATS}
+    failures = {}
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            map_stats_chunk, chunks, [seed_amt] * len(chunks), [size] * len(chunks)
+        )
+        for chunk_histograms, chunk_failures in results:
+            for name, histogram in chunk_histograms.items():
+                histograms[name].update(histogram)
+            for failure, failed_seeds in chunk_failures.items():
+                failures.setdefault(failure, []).extend(failed_seeds)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "config": {
+            "maps": maps,
+            "seed_amt": seed_amt,
+            "size": size,
+            "first_seed": first_seed,
+            "workers": workers or os.cpu_count(),
+        },
+        "elapsed_s": round(elapsed, 3),
+        "failures": {
+            failure: {"count": len(failed_seeds), "seeds": sorted(failed_seeds)[:FAILURE_SAMPLES]}
+            for failure, failed_seeds in failures.items()
+        },
+        "stats": {name: summarize(histogram) for name, histogram in histograms.items()},
+    }
+    output.write(json.dumps(report, indent=2) + "\n")
+
+
+@cli.command(name="convert-levels", help="converts JSON levels to the binary level format")
+@click.argument("paths", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option("--repeat", default=200, help="decodes of each level when timing loads")
+def convert_levels(paths, repeat):
+    """
+    Writes a binary level next to every JSON level in `paths`, or every packaged level if none
+    are given, and verifies it decodes to the same template
+    """
+    if not paths:
+        paths = sorted(
+            os.path.join(LEVELS_DIRECTORY, name) for name in os.listdir(LEVELS_DIRECTORY) if name.endswith(".json")
+        )
+    totals = {"json_bytes": 0, "binary_bytes": 0, "json_s": 0.0, "binary_s": 0.0}
+
+    click.echo(f"{'level':<16}{'JSON B':>10}{'binary B':>10}{'JSON ms':>10}{'binary ms':>10}")
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "rb") as level_file:
+            text = level_file.read()
+        template = decode_level(name, text)
+        payload = template.to_bytes()
+        decoded = decode_level(name, payload)
+        if decoded.level_data() != template.level_data():
+            raise click.ClickException(f"{name} did not survive conversion")
+        with open(os.path.splitext(path)[0] + BINARY_LEVEL_SUFFIX, "wb") as binary_file:
+            binary_file.write(payload)
+
+        timings = {}
+        for label, contents in (("json", text), ("binary", payload)):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                decode_level(name, contents)
+            timings[label] = (time.perf_counter() - started) / repeat
+        totals["json_bytes"] += len(text)
+        totals["binary_bytes"] += len(payload)
+        totals["json_s"] += timings["json"]
+        totals["binary_s"] += timings["binary"]
+        click.echo(
+            f"{name:<16}{len(text):>10}{len(payload):>10}"
+            f"{timings['json'] * 1000:>10.3f}{timings['binary'] * 1000:>10.3f}"
+        )
+    click.echo(
+        f"{'total':<16}{totals['json_bytes']:>10}{totals['binary_bytes']:>10}"
+        f"{totals['json_s'] * 1000:>10.3f}{totals['binary_s'] * 1000:>10.3f}"
+    )
+    click.echo(
+        f"size {totals['json_bytes'] / totals['binary_bytes']:.1f}x smaller, "
+        f"loads {totals['json_s'] / totals['binary_s']:.1f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    cli()